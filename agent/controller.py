@@ -1,19 +1,39 @@
+import asyncio
+import inspect
+import logging
+import os
+import secrets
 import uuid
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from agent.planner import Planner
 from agent.memory import Memory
-from agent.flow import TaskFlow
+from agent.flow import TaskFlow, TaskResult, ExecutionMode, dag_waves
+from llm.checkpoint import JsonlCheckpoint
+from llm.llm_client_base import COMPACTION_PREFIX
 from tools.tool_registry import ToolRegistry
 from observability.logger import AgentLogger
 
+
 class AgentController:
     """
     Orchestrates the agentic workflow. 
     Actively manages the state transition between the Planner and the Executors.
     """
-    def __init__(self, llm_client, storage_type="apache_sqlite"):
+    def __init__(self, llm_client, storage_type="apache_sqlite", synthesis_shortcut: bool = True,
+                 token_budget: int = 3000, compaction: Optional[str] = "summarize",
+                 max_parallel: Optional[int] = None):
         self.controller_id = str(uuid.uuid4())
         self.logger = AgentLogger(name=f"Controller-{self.controller_id}")
+        # Checked before the per-task log lines so filtered logs cost nothing
+        self._log_info_enabled = self.logger.isEnabledFor(logging.INFO)
+        # Skip the final LLM call when the answer is trivially derivable from results
+        self.synthesis_shortcut = synthesis_shortcut
+        # Synthesis prompts are kept under token_budget by compacting older step
+        # results: "summarize" (one LLM call), "window" (drop them) or None (off)
+        self.token_budget = token_budget
+        self.compaction = compaction
+        # Cap on concurrently running tasks in DAG flows (env: AGENT_NUM_PARALLEL)
+        self.max_parallel = max_parallel or int(os.environ.get("AGENT_NUM_PARALLEL", "4"))
         
         # Dependencies
         self.llm = llm_client
@@ -23,17 +43,42 @@ class AgentController:
         
         self.logger.info("Framework Controller initialized and ready for ingress.")
 
-    def execute_workflow(self, workflow: TaskFlow, initial_input: str) -> Dict[str, Any]:
+    def execute_workflow(self, workflow: TaskFlow, initial_input: str,
+                         checkpoint_path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Sync wrapper around aexecute_workflow() for existing callers.
+        """
+        return asyncio.run(self.aexecute_workflow(workflow, initial_input, checkpoint_path))
+
+    async def aexecute_workflow(self, workflow: TaskFlow, initial_input: str,
+                                checkpoint_path: Optional[str] = None) -> Dict[str, Any]:
         """
         Executes a composed task flow.
         Satisfies the requirement: "Orchestrate agentic workflows from input to output."
+        Being a coroutine, many sessions can run concurrently under asyncio.gather.
+        With checkpoint_path, completed task outputs and the final synthesis are
+        appended to a JSONL checkpoint, and a rerun after a crash reuses them.
         """
-        session_id = str(uuid.uuid4())
-        self.logger.info(f"Execution started. Session: {session_id} | Flow: {workflow.name}")
+        # Audit key only; token_hex skips building a UUID object per session
+        session_id = secrets.token_hex(16)
+        self.logger.info("Execution started. Session: %s | Flow: %s", session_id, workflow.name)
         
         # 1. Store initial task in persistent memory for auditing
         self.memory.initialize_session(session_id, initial_input)
 
+        checkpoint = JsonlCheckpoint(checkpoint_path) if checkpoint_path else None
+        try:
+            return await self._arun_workflow(workflow, initial_input, session_id, checkpoint)
+        except BaseException as e:
+            # Tools or synthesis raised: still write the buffered audit trail
+            self.memory.abort_session(session_id, repr(e))
+            raise
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+
+    async def _arun_workflow(self, workflow: TaskFlow, initial_input: str, session_id: str,
+                             checkpoint: Optional[JsonlCheckpoint]) -> Dict[str, Any]:
         # 2. Planning / DAG Validation
         # The planner can dynamically adjust the workflow based on the input
         executable_plan = self.planner.prepare_steps(workflow, initial_input)
@@ -41,62 +86,241 @@ class AgentController:
         results = {}
 
         # 3. Execution Loop (The Orchestration Heart)
-        for task in executable_plan:
-            # Check dependencies (DAG Logic)
-            if not self._check_dependencies(task, results):
-                self.logger.error(f"Task {task.name} blocked by dependency failure.")
-                break
-                
-            # Execute logic
-            output = self._run_task_unit(task, session_id, results)
-            results[task.name] = output
-
-            if output.get("status") == "error":
-                self.logger.warning(f"Aborting flow at {task.name} due to error.")
-                break
+        # DAG flows declare their dependencies, so every unblocked task runs
+        # concurrently; sequential flows keep one task per step
+        if workflow.mode == ExecutionMode.DAG:
+            await self._arun_dag(list(executable_plan), session_id, results, checkpoint, initial_input)
+        else:
+            await self._arun_sequential(executable_plan, session_id, results, checkpoint, initial_input)
 
         # 4. Final Output Action
-        final_response = self.llm.synthesize(initial_input, results)
+        status = "completed"
+        shortcut = self._shortcut_synthesis(results) if self.synthesis_shortcut else None
+        synthesis_key = checkpoint.request_hash("synthesis", initial_input, results) if checkpoint else None
+        if shortcut is not None:
+            status, final_response = shortcut
+            self.logger.info("Synthesis cache_hit: skipped LLM call (status=%s)", status)
+        elif synthesis_key is not None and checkpoint.get(synthesis_key) is not None:
+            final_response = checkpoint.get(synthesis_key)
+        else:
+            prompt_results = await self._compact_results(results)
+            if hasattr(self.llm, "asynthesize"):
+                final_response = await self.llm.asynthesize(initial_input, prompt_results)
+            else:
+                final_response = await asyncio.to_thread(self.llm.synthesize, initial_input, prompt_results)
+            if synthesis_key is not None:
+                checkpoint.append(synthesis_key, final_response)
         
         # 5. Finalize Audit Trail
-        self.memory.close_session(session_id, final_response)
+        self.memory.close_session(session_id, final_response, status)
         
         return {
             "session_id": session_id,
-            "status": "completed",
+            "status": status,
             "output": final_response
         }
 
-    def _run_task_unit(self, task: Any, session_id: str, previous_results: Dict) -> Dict:
+    async def _arun_sequential(self, plan: List[Any], session_id: str, results: Dict[str, Dict],
+                               checkpoint: Optional[JsonlCheckpoint], initial_input: str):
+        # Names of tasks that completed successfully, updated as the loop runs
+        success = set()
+        for task in plan:
+            # Check dependencies (DAG Logic)
+            if not self._check_dependencies(task, success):
+                self.logger.error("Task %s blocked by dependency failure.", task.name)
+                return
+
+            output = await self._run_task_unit(task, session_id, results, checkpoint, initial_input)
+            results[task.name] = output
+            if output.get("status") == "success":
+                success.add(task.name)
+            elif output.get("status") == "error":
+                self.logger.warning("Aborting flow at %s due to error.", task.name)
+                return
+
+    async def _arun_dag(self, plan: List[Any], session_id: str, results: Dict[str, Dict],
+                        checkpoint: Optional[JsonlCheckpoint], initial_input: str):
+        """
+        Same scheduling as DAGStrategy (dag_waves): Kahn's algorithm in waves, each wave run
+        concurrently and capped by max_parallel. A task is released only once
+        every dependency succeeded; the flow stops at the first failed wave.
+        """
+        semaphore = asyncio.Semaphore(self.max_parallel)
+        succeeded = set()
+
+        for wave in dag_waves(plan, succeeded):
+            outputs = await asyncio.gather(*[
+                self._run_bounded(t, session_id, results, checkpoint, initial_input, semaphore) for t in wave
+            ])
+            failed = None
+            for t, output in zip(wave, outputs):
+                results[t.name] = output
+                if output.get("status") == "success":
+                    succeeded.add(t.id)
+                elif output.get("status") == "error" and failed is None:
+                    failed = t
+
+            if failed is not None:
+                self.logger.warning("Aborting flow at %s due to error.", failed.name)
+                return
+
+        # Missing, failed or circular dependencies leave tasks that were never released
+        blocked = [t.name for t in plan if t.name not in results]
+        if blocked:
+            self.logger.error("Tasks %s blocked by dependency failure.", ", ".join(map(str, blocked)))
+
+    async def _run_bounded(self, task: Any, session_id: str, results: Dict[str, Dict],
+                           checkpoint: Optional[JsonlCheckpoint], initial_input: str,
+                           semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        async with semaphore:
+            return await self._run_task_unit(task, session_id, results, checkpoint, initial_input)
+
+    def _shortcut_synthesis(self, results: Dict[str, Dict]) -> Optional[Tuple[str, Any]]:
+        """
+        Returns (status, output) when the final answer needs no LLM call, else None.
+        """
+        if not results:
+            return None
+        outputs = list(results.values())
+        # Every step failed: nothing to synthesize, surface the last error
+        if all(o.get("status") == "error" for o in outputs):
+            return "failed", outputs[-1].get("message")
+        # A single successful step that already produced text is the answer
+        successes = [o for o in outputs if o.get("status") == "success"]
+        if len(outputs) == 1 and len(successes) == 1 and isinstance(successes[0].get("data"), str):
+            return "completed", successes[0]["data"]
+        return None
+
+    async def _compact_results(self, results: Dict[str, Dict]) -> Dict[str, Dict]:
+        """
+        Bounds the results shipped to synthesis by token_budget. The newest step
+        results are kept verbatim; older ones are replaced by a single "_compacted"
+        entry capped at the budget left over. Only a newest result larger than the
+        whole budget can exceed it. The originals remain in the Memory audit trail.
+        """
+        if not self.compaction or not results:
+            return results
+        # ~4 characters per token; close enough for budgeting without a tokenizer
+        limit = self.token_budget * 4
+        sizes = [(name, len(str(output))) for name, output in results.items()]
+        if sum(chars for _, chars in sizes) <= limit:
+            return results
+
+        # 1. Keep the newest results that fit next to the compacted entry (always the last one)
+        entry = {"status": "success", "data": "", "compacted": True, "original_steps": len(results)}
+        budget = limit - len(str(entry))
+        kept, used = [], 0
+        for name, chars in reversed(sizes):
+            if kept and used + chars > budget:
+                break
+            kept.append(name)
+            used += chars
+        older = [name for name in results if name not in kept]
+
+        # 2. Fold the older ones into one entry
+        if self.compaction == "summarize":
+            text = "\n".join(f"{name}: {results[name]}" for name in older)
+            prompt = COMPACTION_PREFIX + text[:limit]
+            if hasattr(self.llm, "agenerate"):
+                summary = await self.llm.agenerate(prompt)
+            else:
+                summary = await asyncio.to_thread(self.llm.generate, prompt)
+            # Local backends (HFLocalLLM, MockLLM) echo the prompt; keep only the completion
+            summary = summary.replace(prompt, "", 1).strip()
+        else:
+            summary = f"{len(older)} earlier step results omitted: {', '.join(older)}"
+        if self._log_info_enabled:
+            self.logger.info("Compacted %d step results (%s)", len(older), self.compaction)
+
+        # 3. Cap the summary at what is left of the budget, measured as rendered
+        # (binary search, since repr() escapes make rendered length non-linear)
+        entry["original_steps"] = len(older)
+        room = limit - used
+        lo, hi = 0, len(summary)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            entry["data"] = summary[:mid]
+            if len(str(entry)) <= room:
+                lo = mid
+            else:
+                hi = mid - 1
+        entry["data"] = summary[:lo]
+
+        compacted = {"_compacted": entry}
+        for name in reversed(kept):
+            compacted[name] = results[name]
+        return compacted
+
+    async def _run_task_unit(self, task: Any, session_id: str, previous_results: Dict,
+                             checkpoint: Optional[JsonlCheckpoint] = None, initial_input: str = "") -> Dict:
         """
         Internal executor logic for a single unit of work.
         """
-        self.logger.info(f"Routing task '{task.name}' to tool '{task.tool_name}'")
+        if self._log_info_enabled:
+            self.logger.info("Routing task '%s' to tool '%s'", task.name, task.tool_name)
+
+        key = None
+        if checkpoint is not None:
+            key = checkpoint.request_hash("task", initial_input, task.name, task.tool_name, task.args)
+            cached = checkpoint.get(key)
+            if cached is not None:
+                # Completed before an interruption: reuse the recorded output
+                self.memory.log_step(session_id, task.name, cached)
+                return {"status": "success", "data": cached}
         
         try:
             # Context injection from memory and previous steps
             context = self.memory.get_session_context(session_id)
             
-            # Execute tool call
-            tool_result = self.tools.execute(
+            # Execute tool call (sync tools in a worker thread, async tools awaited)
+            tool_result = await asyncio.to_thread(
+                self.tools.execute,
                 name=task.tool_name, 
                 args=task.args, 
                 context=context,
                 history=previous_results
             )
+            if inspect.isawaitable(tool_result):
+                tool_result = await tool_result
             
             # Observability: Log result to persistent store
             self.memory.log_step(session_id, task.name, tool_result)
+            if key is not None:
+                checkpoint.append(key, tool_result)
             
             return {"status": "success", "data": tool_result}
             
         except Exception as e:
-            self.logger.error(f"Execution error in {task.name}: {str(e)}")
+            self.logger.error("Execution error in %s: %s", task.name, e)
             return {"status": "error", "message": str(e)}
 
-    def _check_dependencies(self, task: Any, results: Dict) -> bool:
+    def execute(self, action: str, params: Dict[str, Any],
+                context: Optional[Dict[str, Any]] = None) -> TaskResult:
+        """
+        Single tool call used by the TaskFlow strategies.
+        """
+        try:
+            output = self.tools.execute(name=action, args=params, context=context)
+            return TaskResult(task_id=action, success=True, output=output)
+        except Exception as e:
+            self.logger.error("Execution error in %s: %s", action, e)
+            return TaskResult(task_id=action, success=False, error=str(e))
+
+    async def _aexecute(self, action: str, params: Dict[str, Any],
+                        context: Optional[Dict[str, Any]] = None) -> TaskResult:
+        """
+        Async variant of execute(). Sync tools run in a worker thread so
+        independent DAG branches overlap; async tools are awaited directly.
+        """
+        try:
+            output = await asyncio.to_thread(self.tools.execute, name=action, args=params, context=context)
+            if inspect.isawaitable(output):
+                output = await output
+            return TaskResult(task_id=action, success=True, output=output)
+        except Exception as e:
+            self.logger.error("Execution error in %s: %s", action, e)
+            return TaskResult(task_id=action, success=False, error=str(e))
+
+    def _check_dependencies(self, task: Any, success: set) -> bool:
         """Verifies if all parent tasks in the DAG completed successfully."""
-        for dep in task.depends_on:
-            if dep not in results or results[dep].get("status") != "success":
-                return False
-        return True
+        return task.depends_on_set <= success
@@ -1,8 +1,10 @@
 from abc import ABC, abstractmethod
-from typing import Any, Callable, Optional, List, Dict
+from typing import Any, Callable, Iterator, Optional, List, Dict, Set
 from dataclasses import dataclass, field
 from enum import Enum
+import asyncio
 import collections
+import os
 
 class ExecutionMode(Enum):
     SEQUENTIAL = "sequential"
@@ -14,6 +16,7 @@ class Task:
     """
     Unified Task model compatible with AgentController
     """
+    __slots__ = ("id", "name", "tool_name", "args", "depends_on", "depends_on_set")
 
     def __init__(self, id, action, params=None, depends_on=None):
         self.id = id
@@ -23,9 +26,26 @@ class Task:
         self.tool_name = action
         self.args = params or {}
         self.depends_on = depends_on or []
+        # Precomputed for O(1) subset checks in the controller
+        self.depends_on_set = frozenset(self.depends_on)
+
+    # Strategy-facing aliases (SequentialStrategy / DAGStrategy use these names)
+    @property
+    def action(self):
+        return self.tool_name
+
+    @property
+    def params(self):
+        return self.args
+
+    @property
+    def dependencies(self):
+        return self.depends_on
 
 class TaskResult:
     """Audit-friendly result container."""
+    __slots__ = ("task_id", "success", "output", "error")
+
     def __init__(self, task_id: str, success: bool, output: Any = None, error: str = None):
         self.task_id = task_id
         self.success = success
@@ -46,9 +66,8 @@ class SequentialStrategy(ExecutionStrategy):
     def execute(self, tasks: List[Task], controller: Any, context: dict) -> List[TaskResult]:
         results = []
         for task in tasks:
-            # Context injection: merge global context and results from previous tasks
-            params = {**context, **task.params}
-            result = controller.execute(task.action, params)
+            # Tools get the task params as arguments; the shared context travels separately
+            result = controller.execute(task.action, task.params, context)
             result.task_id = task.id
             results.append(result)
             
@@ -56,39 +75,91 @@ class SequentialStrategy(ExecutionStrategy):
             context[f"{task.id}_output"] = result.output
         return results
 
+def dag_waves(tasks: List[Task], succeeded: Set[Any]) -> Iterator[List[Task]]:
+    """
+    Kahn's algorithm in waves: yields every task whose dependencies are all in
+    `succeeded`, which the caller fills with the ids of the tasks that succeeded
+    before asking for the next wave. Tasks that are never released (failed,
+    missing or circular dependencies) are simply never yielded.
+    """
+    # Indegree counts + child adjacency, built once (O(V+E))
+    by_id = {t.id: t for t in tasks}
+    indegree = {t.id: len(t.depends_on_set) for t in tasks}
+    children = collections.defaultdict(list)
+    for t in tasks:
+        for d in t.depends_on_set:
+            children[d].append(t.id)
+    ready = collections.deque(t for t in tasks if indegree[t.id] == 0)
+
+    while ready:
+        wave = list(ready)
+        ready.clear()
+        yield wave
+
+        # Release children whose last dependency just succeeded
+        for task in wave:
+            if task.id not in succeeded:
+                continue
+            for child in children[task.id]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    ready.append(by_id[child])
+
 class DAGStrategy(ExecutionStrategy):
     """
     Implementation of Directed Acyclic Graph execution.
     Fulfills the requirement for non-linear task flows.
+    Tasks whose dependencies are met are dispatched concurrently (fan-out),
+    capped by max_parallel (env: AGENT_NUM_PARALLEL).
     """
+    def __init__(self, max_parallel: Optional[int] = None):
+        self.max_parallel = max_parallel or int(os.environ.get("AGENT_NUM_PARALLEL", "4"))
+
     def execute(self, tasks: List[Task], controller: Any, context: dict) -> List[TaskResult]:
+        """Sync shim for callers outside an event loop."""
+        return asyncio.run(self.aexecute(tasks, controller, context))
+
+    async def aexecute(self, tasks: List[Task], controller: Any, context: dict) -> List[TaskResult]:
         results_map = {}
-        # Simple topological sort/dependency resolution
-        pending = tasks.copy()
         final_results = []
-
-        while pending:
-            # Find tasks with met dependencies
-            ready = [t for t in pending if all(d in results_map for d in t.dependencies)]
-            if not ready:
-                if pending: raise Exception("Circular dependency or missing task detected in DAG")
-                break
-            
-            for task in ready:
-                params = {**context, **task.params}
-                # Inject dependency data into params
-                params["_dep_results"] = {d: results_map[d].output for d in task.dependencies}
-                
-                result = controller.execute(task.action, params)
+        semaphore = asyncio.Semaphore(self.max_parallel)
+        succeeded = set()
+
+        for wave in dag_waves(tasks, succeeded):
+            # Fan-out: every task in the current wave runs concurrently, fan-in once it is done
+            done = await asyncio.gather(
+                *[self._run_one(t, controller, context, results_map, semaphore) for t in wave],
+                return_exceptions=True
+            )
+
+            failed = False
+            for task, result in zip(wave, done):
+                if isinstance(result, BaseException):
+                    result = TaskResult(task.id, success=False, error=str(result))
                 result.task_id = task.id
                 results_map[task.id] = result
                 final_results.append(result)
-                pending.remove(task)
-                
-                if not result.success: return final_results
-        
+                if result.success:
+                    succeeded.add(task.id)
+                failed = failed or not result.success
+
+            if failed: return final_results
+
+        if len(results_map) < len(tasks):
+            raise Exception("Circular dependency or missing task detected in DAG")
         return final_results
 
+    async def _run_one(self, task: Task, controller: Any, context: dict,
+                       results_map: Dict[str, TaskResult], semaphore: asyncio.Semaphore) -> TaskResult:
+        # Inject dependency data into the context (top layer) without copying the shared one
+        dep_results = {d: results_map[d].output for d in task.dependencies}
+        task_context = collections.ChainMap({"_dep_results": dep_results}, context)
+
+        async with semaphore:
+            if hasattr(controller, "_aexecute"):
+                return await controller._aexecute(task.action, task.params, task_context)
+            return await asyncio.to_thread(controller.execute, task.action, task.params, task_context)
+
 # --- Core Flow ---
 
 class TaskFlow:
@@ -117,4 +188,5 @@ class TaskFlow:
         # Log to observability via controller
         controller.logger.info(f"Starting Flow: {self.name} in {self.mode.value} mode")
         strategy = self._strategies[self.mode]
-        return strategy.execute(self.tasks, controller, self.context.copy())
+        # Per-run writes (e.g. "<task>_output") land in a fresh top layer, not the shared base
+        return strategy.execute(self.tasks, controller, collections.ChainMap({}, self.context))
@@ -1,10 +1,46 @@
+import collections
 import json
-import sqlite3 # Base for Apache-style persistence
+import threading
 from datetime import datetime
-from typing import Any, Optional, List, Dict
-from dataclasses import dataclass, field, asdict
+from typing import Any, Optional, List, Dict, Sequence
+from dataclasses import dataclass, field, fields
+from agent.persistence import Persistence, SqliteBackend, CassandraBackend
 
-@dataclass
+# Optional fast serializers
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Below this many in-RAM entries get_summary() counts in Python and skips the query
+_SUMMARY_SQL_THRESHOLD = 256
+
+def _json_dumps(obj: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj)
+
+def _msgpack_dumps(obj: Any) -> bytes:
+    return msgpack.packb(obj, use_bin_type=True)
+
+def _msgpack_loads(blob: bytes) -> Any:
+    return msgpack.unpackb(blob, raw=False)
+
+# Entries go through MemoryEntry.to_dict (shallow) rather than orjson's dataclass support
+_ORJSON_EXPORT = (orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+
+# serializer name -> (dumps, loads). msgpack rows are stored as BLOBs.
+_SERIALIZERS = {
+    "json": (_json_dumps, json.loads),
+    "msgpack": (_msgpack_dumps, _msgpack_loads),
+}
+
+@dataclass(slots=True)
 class MemoryEntry:
     """A single memory entry representing a task execution."""
     session_id: str
@@ -17,32 +53,54 @@ class MemoryEntry:
     metadata: dict = field(default_factory=dict)
     
     def to_dict(self) -> dict:
-        return asdict(self)
+        # Shallow: avoids asdict()'s recursive deep copy of large tool outputs
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+def _export_default(obj: Any) -> Any:
+    # orjson default for exports: entries as dicts, anything else (tool objects, sets...) as str
+    if isinstance(obj, MemoryEntry):
+        return obj.to_dict()
+    return str(obj)
 
 class Memory:
     """
     State Management & Audit Log.
     Optimized for persistent storage to satisfy Apache-ready requirements.
     """
-    def __init__(self, backend_type: str = "sqlite"):
+    def __init__(self, backend_type: str = "sqlite", flush_size: int = 64, serializer: str = "json",
+                 backend: Optional[Persistence] = None):
         self.backend_type = backend_type
+        if serializer == "msgpack" and msgpack is None:
+            raise ImportError("serializer='msgpack' requires the msgpack package")
+        self._dumps, self._loads = _SERIALIZERS[serializer]
+        # Most records carry no metadata; serialize the empty dict once, not per row
+        self._empty_metadata = self._dumps({})
         # In-memory cache for speed during execution
         self.entries: List[MemoryEntry] = []
+        # Per-session index over entries, plus context dicts maintained incrementally
+        self._by_session: Dict[str, List[MemoryEntry]] = {}
+        self._context_cache: Dict[str, dict] = {}
+        # Set once RAM has been cleared, so contexts must be seeded from the store
+        self._cache_cleared = False
+
+        # Rows waiting to be written; handed to the backend as one batch every
+        # flush_size entries or when a session closes
+        self.flush_size = flush_size
+        self._pending: List[tuple] = []
+        # Rows of open sessions (initialize_session .. close_session), committed
+        # together in a single transaction so each session's audit trail is atomic
+        self._session_rows: Dict[str, List[tuple]] = {}
+        self._lock = threading.Lock()
         
-        # In a real Apache setup, you'd initialize a Cassandra or HBase connection here
-        self._init_db()
+        self._backend: Optional[Persistence] = backend if backend is not None else self._init_backend()
 
-    def _init_db(self):
-        """Initialize the persistent audit log table."""
+    def _init_backend(self) -> Optional[Persistence]:
+        """Selects the persistent audit store for backend_type."""
         if self.backend_type == "sqlite":
-            with sqlite3.connect("agent_audit_trail.db") as conn:
-                conn.execute("""
-                    CREATE TABLE IF NOT EXISTS audit_logs (
-                        session_id TEXT, task_id TEXT, action TEXT, 
-                        status TEXT, result TEXT, error TEXT, 
-                        timestamp TEXT, metadata TEXT
-                    )
-                """)
+            return SqliteBackend("agent_audit_trail.db")
+        if self.backend_type == "cassandra":
+            return CassandraBackend()
+        return None
 
     def record(self, session_id: str, task_id: str, action: str, status: str, 
                result: Any = None, error: str = None, **metadata) -> MemoryEntry:
@@ -61,58 +119,163 @@ class Memory:
         )
         
         self.entries.append(entry)
+        self._by_session.setdefault(session_id, []).append(entry)
+        self._update_context(session_id, task_id, result)
         self._persist_to_disk(entry)
         return entry
 
     def _persist_to_disk(self, entry: MemoryEntry):
-        """Standardizing data for Apache-ready storage (JSON strings)."""
-        if self.backend_type == "sqlite":
-            with sqlite3.connect("agent_audit_trail.db") as conn:
-                conn.execute(
-                    "INSERT INTO audit_logs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-                    (entry.session_id, entry.task_id, entry.action, entry.status, 
-                     json.dumps(entry.result), entry.error, entry.timestamp, json.dumps(entry.metadata))
-                )
+        """Standardizing data for Apache-ready storage (JSON strings or msgpack BLOBs)."""
+        if self._backend is not None:
+            metadata = self._dumps(entry.metadata) if entry.metadata else self._empty_metadata
+            row = (entry.session_id, entry.task_id, entry.action, entry.status, 
+                   self._dumps(entry.result), entry.error, entry.timestamp, metadata)
+            with self._lock:
+                session_rows = self._session_rows.get(entry.session_id)
+                if session_rows is not None:
+                    session_rows.append(row)
+                    return
+                self._pending.append(row)
+                should_flush = len(self._pending) >= self.flush_size
+            if should_flush:
+                self.flush()
+
+    def flush(self):
+        """Hands all buffered rows to the backend as a single batch."""
+        with self._lock:
+            if not self._pending or self._backend is None:
+                return
+            self._backend.append_batch(self._pending)
+            self._pending.clear()
 
-    def get_session_history(self, session_id: str) -> List[MemoryEntry]:
-        """Retrieves context for the current agentic loop."""
-        return [e for e in self.entries if e.session_id == session_id]
+    def _commit_session(self, session_id: str):
+        """Writes a closed session's rows (plus any pending rows) in one transaction."""
+        with self._lock:
+            rows = self._pending + self._session_rows.pop(session_id, [])
+            if not rows or self._backend is None:
+                return
+            self._backend.append_batch(rows)
+            self._pending.clear()
+
+    def close(self):
+        """Flushes pending rows (including open sessions) and releases the backend connection."""
+        for session_id in list(self._session_rows):
+            self._commit_session(session_id)
+        self.flush()
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+
+    def get_session_history(self, session_id: str) -> Sequence[MemoryEntry]:
+        """
+        Retrieves context for the current agentic loop.
+        Returns the live append-only index (no per-call copy); callers must not mutate it.
+        """
+        return self._by_session.get(session_id, ())
 
     def get_summary(self, session_id: Optional[str] = None) -> dict:
         """Generates performance metrics for benchmarking."""
-        target_list = [e for e in self.entries if e.session_id == session_id] if session_id else self.entries
-        
-        if not target_list:
+        if (session_id and self._backend is not None and session_id not in self._session_rows
+                and (len(self.entries) >= _SUMMARY_SQL_THRESHOLD or self._cache_cleared
+                     or session_id not in self._by_session)):
+            # Large audit trail, or the session is not (fully) in RAM: aggregate in the
+            # store (GROUP BY over idx_audit_session)
+            self.flush()
+            counts = self._backend.count_statuses(session_id)
+        else:
+            target_list = self._by_session.get(session_id, []) if session_id else self.entries
+            counts = collections.Counter(e.status for e in target_list)
+
+        total = sum(counts.values())
+        if not total:
             return {'total': 0, 'success_rate': 0}
         
-        completed = sum(1 for e in target_list if e.status == 'completed')
+        completed = counts.get('completed', 0)
         return {
-            'total_steps': len(target_list),
+            'total_steps': total,
             'completed': completed,
-            'failed': sum(1 for e in target_list if e.status == 'failed'),
-            'success_rate': (completed / len(target_list)) * 100
+            'failed': counts.get('failed', 0),
+            'success_rate': (completed / total) * 100
         }
 
+    def export_session(self, session_id: str) -> str:
+        """Returns the session's in-RAM entries as an indented JSON array."""
+        entries = self.get_session_history(session_id)
+        if orjson is not None:
+            # Entries are serialized directly via default=; no intermediate list of dicts
+            return orjson.dumps(entries, default=_export_default,
+                                option=_ORJSON_EXPORT | orjson.OPT_INDENT_2).decode()
+        return json.dumps([e.to_dict() for e in entries], indent=2, default=str)
+
+    def export_session_jsonl(self, session_id: str, path: str):
+        """Appends the session's entries to path, one JSON object per line (for long sessions)."""
+        with open(path, "ab") as f:
+            for entry in self.get_session_history(session_id):
+                if orjson is not None:
+                    f.write(orjson.dumps(entry, default=_export_default,
+                                         option=_ORJSON_EXPORT | orjson.OPT_APPEND_NEWLINE))
+                else:
+                    f.write(json.dumps(entry.to_dict(), default=str).encode() + b"\n")
+
     def clear_session_cache(self):
         """Clears RAM while keeping the persistent audit trail on disk."""
         self.entries.clear()
+        self._by_session.clear()
+        self._context_cache.clear()
+        self._cache_cleared = True
 
     # --- Compatibility layer for controller ---
 
     def initialize_session(self, session_id: str, initial_input: str):
         """Start a session"""
+        if self._backend is not None:
+            with self._lock:
+                self._session_rows.setdefault(session_id, [])
         self.record(session_id, "session_start", "input", "started", result=initial_input)
 
-    def log_step(self, session_id: str, task_name: str, result: dict):
+    def log_step(self, session_id: str, task_name: str, result: Any):
         """Log each step execution"""
-        status = result.get("status", "unknown")
+        status = result.get("status", "unknown") if isinstance(result, dict) else "unknown"
         self.record(session_id, task_name, "tool_execution", status, result=result)
 
-    def close_session(self, session_id: str, final_output: str):
-        """Close session"""
-        self.record(session_id, "session_end", "output", "completed", result=final_output)
+    def close_session(self, session_id: str, final_output: str, status: str = "completed"):
+        """Close session (status mirrors the workflow result, e.g. "failed")"""
+        self.record(session_id, "session_end", "output", status, result=final_output)
+        self._commit_session(session_id)
+
+    def abort_session(self, session_id: str, error: str):
+        """Close a session whose workflow raised, committing its buffered rows"""
+        self.record(session_id, "session_end", "output", "aborted", error=error)
+        self._commit_session(session_id)
 
     def get_session_context(self, session_id: str) -> dict:
-        """Provide previous steps as context"""
-        history = self.get_session_history(session_id)
-        return {entry.task_id: entry.result for entry in history if entry.result is not None}
+        """Provide previous steps as context (live dict, kept up to date by record())"""
+        context = self._context_cache.get(session_id)
+        if context is None:
+            # RAM cache was cleared or session is unknown: rebuild from the indexed audit trail
+            context = self._load_session_context(session_id)
+            self._context_cache[session_id] = context
+        return context
+
+    def _update_context(self, session_id: str, task_id: str, result: Any):
+        context = self._context_cache.get(session_id)
+        if context is None:
+            context = self._load_session_context(session_id) if self._cache_cleared else {}
+            self._context_cache[session_id] = context
+        if result is not None:
+            context[task_id] = result
+
+    def _load_session_context(self, session_id: str) -> dict:
+        if self._backend is None:
+            return {}
+        self.flush()
+        rows = list(self._backend.fetch_session_results(session_id))
+        # Rows of a still-open session are buffered, not yet in the store
+        with self._lock:
+            rows.extend((row[1], row[4]) for row in self._session_rows.get(session_id, []))
+        context = {}
+        for task_id, result in rows:
+            value = self._loads(result) if result is not None else None
+            if value is not None:
+                context[task_id] = value
+        return context
@@ -0,0 +1,127 @@
+import sqlite3
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+
+# Row layout shared by every backend:
+# (session_id, task_id, action, status, result, error, timestamp, metadata)
+AuditRow = Tuple[Any, ...]
+
+class Persistence(Protocol):
+    """
+    Batched storage interface for the audit trail.
+    Memory buffers rows and hands them over in batches, so every backend
+    gets one round-trip per batch instead of one per record.
+    """
+    def append_batch(self, rows: List[AuditRow]) -> None: ...
+
+    def fetch_session_results(self, session_id: str) -> List[Tuple[str, Any]]: ...
+
+    def count_statuses(self, session_id: str) -> Dict[str, int]: ...
+
+    def close(self) -> None: ...
+
+
+_INSERT_SQL = "INSERT INTO audit_logs VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+_RESULTS_SQL = "SELECT task_id, result FROM audit_logs WHERE session_id = ? ORDER BY rowid"
+_SUMMARY_SQL = "SELECT status, COUNT(*) FROM audit_logs WHERE session_id = ? GROUP BY status"
+
+# Applied once per connection: WAL keeps readers and the writer from blocking
+# each other, NORMAL synchronous is durable under WAL with far fewer fsyncs.
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA mmap_size=268435456",
+)
+
+class SqliteBackend:
+    """Single long-lived SQLite connection; each batch is one executemany transaction."""
+    def __init__(self, db_path: str = "agent_audit_trail.db"):
+        self._conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self._cursor = self._conn.cursor()
+        for pragma in _PRAGMAS:
+            self._conn.execute(pragma)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS audit_logs (
+                session_id TEXT, task_id TEXT, action TEXT,
+                status TEXT, result TEXT, error TEXT,
+                timestamp TEXT, metadata TEXT
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_session ON audit_logs(session_id)")
+
+    def append_batch(self, rows: List[AuditRow]) -> None:
+        self._cursor.execute("BEGIN")
+        try:
+            self._cursor.executemany(_INSERT_SQL, rows)
+            self._cursor.execute("COMMIT")
+        except BaseException:
+            # Leave the connection usable for later batches (SQLite may already have rolled back)
+            if self._conn.in_transaction:
+                self._cursor.execute("ROLLBACK")
+            raise
+
+    def fetch_session_results(self, session_id: str) -> List[Tuple[str, Any]]:
+        return self._conn.execute(_RESULTS_SQL, (session_id,)).fetchall()
+
+    def count_statuses(self, session_id: str) -> Dict[str, int]:
+        return dict(self._conn.execute(_SUMMARY_SQL, (session_id,)).fetchall())
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class CassandraBackend:
+    """
+    Apache Cassandra audit store (requires the cassandra-driver package).
+    Batches are written with execute_concurrent_with_args over a prepared INSERT.
+    """
+    def __init__(self, contact_points: Optional[List[str]] = None, keyspace: str = "agent_audit",
+                 concurrency: int = 64):
+        from cassandra.cluster import Cluster
+        from cassandra.concurrent import execute_concurrent_with_args
+
+        self._execute_concurrent = execute_concurrent_with_args
+        self.concurrency = concurrency
+        self._cluster = Cluster(contact_points or ["127.0.0.1"])
+        self._session = self._cluster.connect()
+        self._session.execute(
+            f"CREATE KEYSPACE IF NOT EXISTS {keyspace} "
+            "WITH replication = {'class': 'SimpleStrategy', 'replication_factor': 1}"
+        )
+        self._session.set_keyspace(keyspace)
+        # Partitioned by session so per-session reads hit a single partition
+        self._session.execute("""
+            CREATE TABLE IF NOT EXISTS audit_logs (
+                session_id text, task_id text, action text,
+                status text, result text, error text,
+                timestamp text, metadata text,
+                PRIMARY KEY (session_id, timestamp, task_id)
+            )
+        """)
+        self._insert = self._session.prepare(
+            "INSERT INTO audit_logs (session_id, task_id, action, status, result, error, timestamp, metadata) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+        )
+        self._select = self._session.prepare(
+            "SELECT task_id, result FROM audit_logs WHERE session_id = ?"
+        )
+        self._statuses = self._session.prepare(
+            "SELECT status FROM audit_logs WHERE session_id = ?"
+        )
+
+    def append_batch(self, rows: List[AuditRow]) -> None:
+        self._execute_concurrent(self._session, self._insert, rows, concurrency=self.concurrency)
+
+    def fetch_session_results(self, session_id: str) -> List[Tuple[str, Any]]:
+        return [(row.task_id, row.result) for row in self._session.execute(self._select, (session_id,))]
+
+    def count_statuses(self, session_id: str) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for row in self._session.execute(self._statuses, (session_id,)):
+            counts[row.status] = counts.get(row.status, 0) + 1
+        return counts
+
+    def close(self) -> None:
+        self._cluster.shutdown()
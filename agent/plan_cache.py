@@ -0,0 +1,137 @@
+import hashlib
+import json
+import math
+import sqlite3
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from agent.flow import Task
+
+class PlanCache:
+    """
+    Plan-template cache for the Planner.
+    Tier 1: exact SHA-256 fingerprint of the normalized goal, context and scope.
+    Tier 2 (optional): nearest cached goal by embedding cosine similarity, within the same
+    scope and context.
+    The scope (e.g. "<mode>:<model>") keeps plans from one backend or mode away from another.
+    Entries are evicted least-frequently-used first (oldest first among ties) once
+    max_entries is exceeded; the entry being inserted is never evicted.
+    """
+    def __init__(self, db_path: str = "agent_plan_cache.db",
+                 embedder: Optional[Callable[[str], Sequence[float]]] = None,
+                 similarity_threshold: float = 0.90, max_entries: int = 512):
+        self.db_path = db_path
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self._init_db()
+
+    def _init_db(self):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS plan_cache (
+                    fingerprint TEXT PRIMARY KEY, tasks_json TEXT,
+                    embedding BLOB, hits INTEGER, scope TEXT, context_hash TEXT
+                )
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(plan_cache)")}
+            # Cache files written before plans were scoped / keyed on context
+            for column in ("scope", "context_hash"):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE plan_cache ADD COLUMN {column} TEXT")
+
+    @staticmethod
+    def normalize(goal: str) -> str:
+        return " ".join(goal.lower().split())
+
+    def fingerprint(self, goal: str, context: Optional[Dict[str, Any]] = None, scope: str = "") -> str:
+        key = json.dumps({"goal": self.normalize(goal), "context": context, "scope": scope},
+                         sort_keys=True, default=str)
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def context_hash(context: Optional[Dict[str, Any]] = None) -> str:
+        key = json.dumps(context, sort_keys=True, default=str)
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def get(self, goal: str, context: Optional[Dict[str, Any]] = None, scope: str = "") -> Optional[List[Task]]:
+        """Exact lookup first, then semantic lookup if an embedder is configured."""
+        fp = self.fingerprint(goal, context, scope)
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute("SELECT tasks_json FROM plan_cache WHERE fingerprint = ?", (fp,)).fetchone()
+            if row is None and self.embedder is not None:
+                fp, row = self._nearest(conn, goal, context, scope)
+            if row is None:
+                return None
+            conn.execute("UPDATE plan_cache SET hits = hits + 1 WHERE fingerprint = ?", (fp,))
+        return self._deserialize(row[0])
+
+    def put(self, goal: str, tasks: List[Task], context: Optional[Dict[str, Any]] = None, scope: str = ""):
+        if not tasks:
+            # An empty plan is a planning failure, not something to replay
+            return
+        fp = self.fingerprint(goal, context, scope)
+        embedding = None
+        if self.embedder is not None:
+            embedding = array("f", self.embedder(self.normalize(goal))).tobytes()
+
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO plan_cache (fingerprint, tasks_json, embedding, hits, scope, context_hash) "
+                "VALUES (?, ?, ?, 0, ?, ?)",
+                (fp, self._serialize(tasks), embedding, scope, self.context_hash(context))
+            )
+            self._evict(conn, keep=fp)
+
+    def _nearest(self, conn: sqlite3.Connection, goal: str, context: Optional[Dict[str, Any]], scope: str):
+        query = array("f", self.embedder(self.normalize(goal)))
+        best_fp, best_sim = None, self.similarity_threshold
+        # Only goals planned under the same context are candidates, as in the exact tier
+        rows = conn.execute(
+            "SELECT fingerprint, embedding FROM plan_cache "
+            "WHERE embedding IS NOT NULL AND scope IS ? AND context_hash IS ?",
+            (scope, self.context_hash(context))
+        )
+        for fp, blob in rows:
+            candidate = array("f")
+            candidate.frombytes(blob)
+            sim = self._cosine(query, candidate)
+            if sim >= best_sim:
+                best_fp, best_sim = fp, sim
+        if best_fp is None:
+            return None, None
+        return best_fp, conn.execute("SELECT tasks_json FROM plan_cache WHERE fingerprint = ?", (best_fp,)).fetchone()
+
+    def _evict(self, conn: sqlite3.Connection, keep: str):
+        """LFU eviction: drop the least-hit, oldest (by rowid) entries beyond max_entries."""
+        (count,) = conn.execute("SELECT COUNT(*) FROM plan_cache").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            # The just-inserted entry (hits=0) is exempt, or it would always be the victim
+            conn.execute(
+                "DELETE FROM plan_cache WHERE fingerprint IN "
+                "(SELECT fingerprint FROM plan_cache WHERE fingerprint != ? ORDER BY hits ASC, rowid ASC LIMIT ?)",
+                (keep, overflow)
+            )
+
+    @staticmethod
+    def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+        if len(a) != len(b):
+            return 0.0
+        dot = sum(x * y for x, y in zip(a, b))
+        norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+        return dot / norm if norm else 0.0
+
+    @staticmethod
+    def _serialize(tasks: List[Task]) -> str:
+        return json.dumps([
+            {"id": t.id, "action": t.tool_name, "params": t.args, "dependencies": t.depends_on}
+            for t in tasks
+        ])
+
+    @staticmethod
+    def _deserialize(tasks_json: str) -> List[Task]:
+        return [
+            Task(id=item["id"], action=item["action"], params=item["params"], depends_on=item["dependencies"])
+            for item in json.loads(tasks_json)
+        ]
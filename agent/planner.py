@@ -1,34 +1,117 @@
+import asyncio
 import json
-from typing import List, Dict, Any
+import os
+import re
+from typing import List, Dict, Any, Optional, Tuple
 from agent.flow import Task, ExecutionMode
+from agent.plan_cache import PlanCache
+from llm.llm_client_base import GOAL_MARKER
 # Use the LLM Client we'll optimize with OpenVINO
 from llm.llm_client import HFLocalLLM
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Greedy match from the first '{' to the last '}' in LLM prose
+_JSON_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+
+# (id, action, params, dependencies) rows for the guardrail plan; string params are
+# format templates filled with the goal per call
+_FALLBACK_TEMPLATE: Tuple[tuple, ...] = (
+    ("analysis", "llm_tool", {"query": "Analyze: {goal}"}, ()),
+    ("summary", "report_tool", {}, ("analysis",)),
+)
 
 class Planner:
     """
     The Brain of the Agent. 
     Uses LLM reasoning to decompose goals into executable Task objects.
     """
-    def __init__(self,  llm_client):
+    def __init__(self,  llm_client, plan_cache: Optional[PlanCache] = None):
         self.llm = llm_client
+        # Previously decomposed goals are served from here without an LLM call.
+        # The default cache file is only created once the planner actually plans.
+        self._plan_cache = plan_cache
         self.system_prompt = (
             "You are a Task Decomposition Engine. Break the user's goal into a "
             "structured JSON list of tasks. Each task must have: "
             "'id', 'action' (tool name), and 'params' (input for tool)."
         )
+        # Everything up to the goal is byte-identical across calls, so backends
+        # with prefix (KV) caching only prefill the goal itself
+        self._prompt_prefix = f"{self.system_prompt} Return JSON format only.{GOAL_MARKER}"
+
+    @property
+    def plan_cache(self) -> PlanCache:
+        if self._plan_cache is None:
+            self._plan_cache = PlanCache()
+        return self._plan_cache
+
+    def _cache_scope(self, mode: ExecutionMode) -> str:
+        # Plans are only reused for the same execution mode and model
+        return f"{mode.value}:{getattr(self.llm, 'model_name', type(self.llm).__name__)}"
 
-    def generate_plan(self, goal: str, mode: ExecutionMode = ExecutionMode.SEQUENTIAL) -> List[Task]:
+    def generate_plan(self, goal: str, mode: ExecutionMode = ExecutionMode.SEQUENTIAL,
+                      context: Optional[Dict[str, Any]] = None) -> List[Task]:
         """
         Calls the LLM to create a dynamic plan based on the user's goal.
+        Cached plans (exact or semantically similar goal) skip the LLM entirely.
         """
+        # 0. Plan cache lookup
+        scope = self._cache_scope(mode)
+        cached = self.plan_cache.get(goal, context, scope)
+        if cached is not None:
+            return cached
+
         # 1. Construct the reasoning prompt
-        prompt = f"{self.system_prompt}\n\nGoal: {goal}\n\nReturn JSON format only."
+        prompt = self._build_prompt(goal)
 
         # 2. Get LLM response (This will be the OpenVINO-optimized call)
         raw_response = self.llm.generate(prompt)
         
         # 3. Parse LLM output into framework-compatible Task objects
+        return self._tasks_from_response(goal, raw_response, context, scope)
+
+    async def agenerate_plan(self, goal: str, mode: ExecutionMode = ExecutionMode.SEQUENTIAL,
+                             context: Optional[Dict[str, Any]] = None) -> List[Task]:
+        """
+        Async variant of generate_plan() so several goals can be planned concurrently.
+        """
+        scope = self._cache_scope(mode)
+        cached = self.plan_cache.get(goal, context, scope)
+        if cached is not None:
+            return cached
+
+        prompt = self._build_prompt(goal)
+        if hasattr(self.llm, "agenerate"):
+            raw_response = await self.llm.agenerate(prompt)
+        else:
+            raw_response = await asyncio.to_thread(self.llm.generate, prompt)
+        return self._tasks_from_response(goal, raw_response, context, scope)
+
+    async def agenerate_plans(self, goals: List[str], mode: ExecutionMode = ExecutionMode.SEQUENTIAL,
+                              max_parallel: Optional[int] = None) -> List[List[Task]]:
+        """
+        Plans many independent goals at once; concurrency capped by
+        max_parallel (env: AGENT_NUM_PARALLEL). Results keep the order of goals.
+        """
+        semaphore = asyncio.Semaphore(max_parallel or int(os.environ.get("AGENT_NUM_PARALLEL", "4")))
+
+        async def _bounded(goal: str) -> List[Task]:
+            async with semaphore:
+                return await self.agenerate_plan(goal, mode)
+
+        return await asyncio.gather(*(_bounded(g) for g in goals))
+
+    def _build_prompt(self, goal: str) -> str:
+        return self._prompt_prefix + goal
+
+    def _tasks_from_response(self, goal: str, raw_response: str,
+                             context: Optional[Dict[str, Any]] = None, scope: str = "") -> List[Task]:
         try:
             plan_data = self._parse_json(raw_response)
             tasks = []
@@ -37,8 +120,11 @@ class Planner:
                     id=item['id'],
                     action=item['action'],
                     params=item.get('params', {}),
-                    dependencies=item.get('dependencies', [])
+                    depends_on=item.get('dependencies', [])
                 ))
+            if not tasks:
+                raise ValueError("LLM response contained no tasks")
+            self.plan_cache.put(goal, tasks, context, scope)
             return tasks
         except Exception as e:
             # Fallback to a basic template if LLM fails (Guardrail)
@@ -47,15 +133,19 @@ class Planner:
 
     def _parse_json(self, text: str) -> Dict:
         """Helper to extract JSON from LLM prose."""
-        start = text.find("{")
-        end = text.rfind("}") + 1
-        return json.loads(text[start:end])
+        match = _JSON_RE.search(text)
+        if match is None:
+            raise ValueError("No JSON object found in LLM response")
+        return _json_loads(match.group(0))
 
     def _get_fallback_plan(self, goal: str) -> List[Task]:
         """Ensures the agent is reliable even if the LLM output is malformed."""
+        # Fresh Task objects (and param dicts) per call; the template itself is goal-independent
         return [
-            Task(id="analysis", action="llm_tool", params={"query": f"Analyze: {goal}"}),
-            Task(id="summary", action="report_tool", dependencies=["analysis"])
+            Task(id=task_id, action=action,
+                 params={k: v.format(goal=goal) if isinstance(v, str) else v for k, v in params.items()},
+                 depends_on=list(deps))
+            for task_id, action, params, deps in _FALLBACK_TEMPLATE
         ]
     
 
@@ -0,0 +1,70 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+
+@dataclass
+class BatchedRequest:
+    prompt: str
+    future: asyncio.Future
+
+
+class RequestBatcher:
+    """
+    Coalesces concurrent prompts into batched backend calls.
+    Requests are bucketed (e.g. by f"{model}:{round(temperature, 1)}") and flushed
+    every batch_interval seconds or as soon as a bucket reaches max_batch_size.
+    batch_fn takes a list of prompts and returns the outputs in the same order,
+    e.g. HFLocalLLM.generate_batch (one padded forward pass for the whole batch).
+    """
+    def __init__(self, batch_fn: Callable[[List[str]], List[str]],
+                 batch_interval: float = 0.02, max_batch_size: int = 16):
+        self.batch_fn = batch_fn
+        self.batch_interval = batch_interval
+        self.max_batch_size = max_batch_size
+        self.pending: Dict[str, List[BatchedRequest]] = {}
+        self._event: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(self, prompt: str, bucket: str = "default") -> str:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done():
+            self._event = asyncio.Event()
+            self._task = loop.create_task(self._loop())
+
+        request = BatchedRequest(prompt=prompt, future=loop.create_future())
+        queue = self.pending.setdefault(bucket, [])
+        queue.append(request)
+        if len(queue) >= self.max_batch_size:
+            self._event.set()
+        return await request.future
+
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout=self.batch_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._event.clear()
+
+            if not self.pending:
+                # Idle: stop; the next submit() starts a fresh loop
+                self._task = None
+                return
+
+            batches, self.pending = self.pending, {}
+            for requests in batches.values():
+                for i in range(0, len(requests), self.max_batch_size):
+                    await self._dispatch(requests[i:i + self.max_batch_size])
+
+    async def _dispatch(self, requests: List[BatchedRequest]):
+        try:
+            outputs = await asyncio.to_thread(self.batch_fn, [r.prompt for r in requests])
+        except Exception as e:
+            for r in requests:
+                if not r.future.done():
+                    r.future.set_exception(e)
+            return
+        for r, output in zip(requests, outputs):
+            if not r.future.done():
+                r.future.set_result(output)
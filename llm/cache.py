@@ -0,0 +1,121 @@
+import functools
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from llm.llm_client_base import COMPACTION_PREFIX, GOAL_MARKER, SYNTHESIS_PREFIX
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+
+class LLMCache:
+    """
+    Exact-match response cache for deterministic LLM calls.
+    In-memory LRU by default; persisted with diskcache when a directory is given.
+    """
+    def __init__(self, max_entries: int = 1024, directory: Optional[str] = None):
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0}
+        if directory is not None:
+            if diskcache is None:
+                raise ImportError("LLMCache(directory=...) requires the diskcache package")
+            self._disk = diskcache.Cache(directory)
+            self._lru = None
+        else:
+            self._disk = None
+            self._lru = OrderedDict()
+        # generate() runs in worker threads; get's lookup + move_to_end must not race an eviction
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(model: str, prompt: str, temperature: float, max_tokens: int) -> Optional[str]:
+        """SHA-256 of the request; None when sampling makes the output non-deterministic."""
+        if temperature > 0:
+            return None
+        payload = json.dumps(
+            {"model": model, "prompt": prompt, "temperature": temperature, "max_tokens": max_tokens},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if self._disk is not None:
+                value = self._disk.get(key)
+            else:
+                value = self._lru.get(key)
+                if value is not None:
+                    self._lru.move_to_end(key)
+            self.stats["hits" if value is not None else "misses"] += 1
+            return value
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            if self._disk is not None:
+                self._disk.set(key, value)
+                return
+            self._lru[key] = value
+            self._lru.move_to_end(key)
+            if len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            if self._disk is not None:
+                self._disk.clear()
+            else:
+                self._lru.clear()
+
+
+def semantic_text(prompt: str) -> Optional[str]:
+    """
+    Part of a prompt to embed for semantic lookup, or None to skip it.
+    Static instruction prefixes would dominate the embedding (MiniLM truncates at
+    256 word-pieces), so planner prompts are matched on their goal only. Synthesis
+    and compaction prompts are skipped: their answer depends on the results payload.
+    """
+    if prompt.startswith((SYNTHESIS_PREFIX, COMPACTION_PREFIX)):
+        return None
+    _, marker, goal = prompt.rpartition(GOAL_MARKER)
+    return goal if marker else prompt
+
+
+def cached_generate(method: Callable) -> Callable:
+    """
+    Decorator for `generate(self, prompt)` on LLM clients exposing `cache`,
+    `model_name`, `temperature` and `max_new_tokens`. Identical deterministic
+    prompts are answered from the cache instead of re-running inference.
+    If the client also has a `semantic_cache` (see llm.semantic_cache), it is
+    consulted after an exact miss so near-duplicate prompts skip inference too
+    (matching on semantic_text(prompt)).
+    """
+    @functools.wraps(method)
+    def wrapper(self, prompt: str, *args, **kwargs):
+        cache = getattr(self, "cache", None)
+        semantic = getattr(self, "semantic_cache", None)
+        text = semantic_text(prompt) if semantic is not None else None
+        key = None
+        if cache is not None:
+            key = cache.cache_key(self.model_name, prompt, self.temperature, self.max_new_tokens)
+            if key is not None:
+                cached = cache.get(key)
+                if cached is not None:
+                    return cached
+
+        if text is not None:
+            cached = semantic.lookup(text)
+            if cached is not None:
+                return cached
+
+        response = method(self, prompt, *args, **kwargs)
+        if key is not None:
+            cache.set(key, response)
+        if text is not None:
+            semantic.add(text, response)
+        return response
+    return wrapper
@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JsonlCheckpoint:
+    """
+    Append-only JSONL record of completed calls, keyed by request hash.
+    Reopening the same path after a crash restores every completed response,
+    so a rerun skips work that already finished. Lines are flushed on append
+    and fsync'ed every fsync_every records.
+    """
+    def __init__(self, path: str, fsync_every: int = 16):
+        self.path = path
+        self.fsync_every = fsync_every
+        self._responses: Dict[str, Any] = {}
+        self._unsynced = 0
+
+        if os.path.exists(path):
+            complete = 0
+            with open(path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # Partial last line from an interrupted write
+                        break
+                    complete += len(line)
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._responses[record["request_hash"]] = record["response"]
+            if complete < os.path.getsize(path):
+                # Cut the partial line so the next append starts on a fresh line
+                os.truncate(path, complete)
+        self._file = open(path, "ab")
+
+    @property
+    def seen(self):
+        return self._responses.keys()
+
+    @staticmethod
+    def request_hash(*parts: Any) -> str:
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, request_hash: str) -> Optional[Any]:
+        return self._responses.get(request_hash)
+
+    def append(self, request_hash: str, response: Any):
+        record = {"request_hash": request_hash, "response": response}
+        if orjson is not None:
+            line = orjson.dumps(record, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+        else:
+            line = json.dumps(record, default=str).encode("utf-8") + b"\n"
+        self._file.write(line)
+        self._file.flush()
+        self._responses[request_hash] = response
+
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def close(self):
+        if not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
@@ -0,0 +1,113 @@
+import asyncio
+import importlib.util
+import weakref
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from llm.llm_client_base import LLMClient, LLMProvider, LLMRequest, LLMResponse
+from llm.ratelimiter import AdaptiveLimiter, shared_bucket
+
+# HTTP/2 needs the optional h2 package; fall back to pooled HTTP/1.1 keep-alive without it
+_HTTP2 = importlib.util.find_spec("h2") is not None
+_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+
+
+# One connection pool per (provider, base_url, timeout), shared by every client instance.
+# Async pools are also per event loop: their connections are bound to the loop that opened
+# them, and AgentController.execute_workflow starts a new loop (asyncio.run) on every call.
+_ASYNC_POOLS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, str, float], httpx.AsyncClient]]" = \
+    weakref.WeakKeyDictionary()
+_SYNC_POOLS: Dict[Tuple[str, str, float], httpx.Client] = {}
+
+
+def _shared_async_client(key: Tuple[str, str, float]) -> httpx.AsyncClient:
+    pools = _ASYNC_POOLS.setdefault(asyncio.get_running_loop(), {})
+    client = pools.get(key)
+    if client is None or client.is_closed:
+        client = pools[key] = httpx.AsyncClient(
+            base_url=key[1], http2=_HTTP2, limits=_LIMITS, timeout=key[2]
+        )
+    return client
+
+
+def _shared_sync_client(key: Tuple[str, str, float]) -> httpx.Client:
+    client = _SYNC_POOLS.get(key)
+    if client is None or client.is_closed:
+        client = _SYNC_POOLS[key] = httpx.Client(
+            base_url=key[1], http2=_HTTP2, limits=_LIMITS, timeout=key[2]
+        )
+    return client
+
+
+class HTTPLLMClient(LLMClient):
+    """
+    Client for OpenAI-compatible chat-completions servers (OpenAI, vLLM, Ollama,
+    OpenVINO Model Server). Requests reuse a pooled keep-alive connection instead
+    of paying a TCP/TLS handshake per call. In-flight async calls are capped by an
+    AIMD limit (at most concurrency_limit, halved on HTTP 429), and with
+    tokens_per_minute set they are paced by a token bucket shared per (provider, model).
+    """
+    def __init__(self, base_url: str, model: str, provider: LLMProvider = LLMProvider.OPENAI,
+                 api_key: Optional[str] = None, timeout: float = 60.0, concurrency_limit: int = 16,
+                 tokens_per_minute: Optional[float] = None):
+        self.provider = provider
+        self.base_url = base_url
+        self.model = model
+        self.timeout = timeout
+        self.concurrency_limit = concurrency_limit
+        self._headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self._pool_key = (provider.value, base_url, timeout)
+        self._limiter = AdaptiveLimiter(concurrency_limit)
+        self._bucket = shared_bucket((provider.value, model), tokens_per_minute) if tokens_per_minute else None
+
+    def _payload(self, request: LLMRequest) -> dict:
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": request.prompt}],
+            "temperature": request.temperature,
+            "max_tokens": request.max_tokens,
+        }
+
+    @staticmethod
+    def _estimate_tokens(request: LLMRequest) -> int:
+        # ~4 characters per token for the prompt, plus the completion budget
+        return len(request.prompt) // 4 + request.max_tokens
+
+    @staticmethod
+    def _to_response(data: dict) -> LLMResponse:
+        return LLMResponse(text=data["choices"][0]["message"]["content"], raw=data)
+
+    def generate(self, request: LLMRequest) -> LLMResponse:
+        client = _shared_sync_client(self._pool_key)
+        resp = client.post("/chat/completions", json=self._payload(request), headers=self._headers)
+        resp.raise_for_status()
+        return self._to_response(resp.json())
+
+    async def agenerate(self, request: LLMRequest) -> LLMResponse:
+        if self._bucket is not None:
+            await self._bucket.acquire(self._estimate_tokens(request))
+        client = _shared_async_client(self._pool_key)
+        async with self._limiter:
+            resp = await client.post("/chat/completions", json=self._payload(request), headers=self._headers)
+            if resp.status_code == 429:
+                self._limiter.on_overload()
+            else:
+                self._limiter.on_success()
+        resp.raise_for_status()
+        return self._to_response(resp.json())
+
+    async def aclose(self):
+        """Closes the shared pools for this endpoint (affects every client using it)."""
+        client = _ASYNC_POOLS.get(asyncio.get_running_loop(), {}).pop(self._pool_key, None)
+        if client is not None:
+            await client.aclose()
+        sync_client = _SYNC_POOLS.pop(self._pool_key, None)
+        if sync_client is not None:
+            sync_client.close()
+
+    async def __aenter__(self) -> "HTTPLLMClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
@@ -1,30 +1,383 @@
-from transformers import AutoTokenizer, AutoModelForCausalLM
-import torch
+import asyncio
+import importlib.util
+import threading
+from collections import OrderedDict
+from typing import Iterator, List, Literal, Optional
+from llm.cache import LLMCache, cached_generate
+from llm.llm_client_base import SYNTHESIS_PREFIX, LLMClient, LLMProvider, LLMRequest
+from llm.mock_llm import MockLLM
+
+# torch / transformers are imported inside the methods that use them, so importing
+# this module (planner, main, mock-only runs) does not pay the multi-second torch import.
+
+def _openvino_available() -> bool:
+    # find_spec on a dotted name imports the parent, so check "optimum" first
+    return (importlib.util.find_spec("optimum") is not None
+            and importlib.util.find_spec("optimum.intel") is not None)
 
 class HFLocalLLM:
-    def __init__(self, model_name="microsoft/Phi-3-mini-4k-instruct"):
-        print("Loading local model... (first time takes 2–5 minutes)")
+    def __init__(self, model_name="microsoft/Phi-3-mini-4k-instruct", temperature: float = 0.7,
+                 max_new_tokens: int = 300, cache: Optional[LLMCache] = None, semantic_cache=None,
+                 quantization: Optional[Literal["fp16", "int8", "int4"]] = None,
+                 device: Optional[str] = None, kv_cache_slots: int = 2,
+                 kv_cache_max_bytes: int = 256 * 2**20, min_prefix_tokens: int = 16,
+                 compile_model: bool = False):
+        self.model_name = model_name
+        self.temperature = temperature
+        self.max_new_tokens = max_new_tokens
+        # Only consulted for deterministic (temperature == 0) generation
+        self.cache = cache if cache is not None else LLMCache()
+        self.stats = self.cache.stats
+        # Optional llm.semantic_cache.SemanticCache for near-duplicate prompts
+        self.semantic_cache = semantic_cache
         
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForCausalLM.from_pretrained(
-            model_name,
-            torch_dtype=torch.float16,
-            device_map="auto"
+        # Weight-only quantization: int4 streams ~4x fewer weight bytes per decoded token.
+        # bitsandbytes is optional and needs CUDA, so the default is int4 only on GPU
+        # hosts with bitsandbytes installed, and fp16 otherwise.
+        import torch
+        cuda = torch.cuda.is_available()
+        if quantization is None:
+            quantization = "int4" if cuda and importlib.util.find_spec("bitsandbytes") is not None else "fp16"
+        self.quantization = quantization
+
+        # OpenVINO device ("CPU", "GPU", ...). Without CUDA, the INT8 OpenVINO path is
+        # used automatically when optimum-intel is installed.
+        if device is None and not cuda and _openvino_available():
+            device = "CPU"
+        self.device = device
+
+        # Weights are loaded on first use, not at construction
+        self._tokenizer = None
+        self._model = None
+
+        # Prefix KV-cache reuse (torch path only): up to kv_cache_slots caches of earlier
+        # prompts, LRU-evicted. A prompt sharing >= min_prefix_tokens leading tokens with
+        # a slot (static prompt prefix, earlier turns) only prefills the new suffix.
+        # The kept caches hold at most kv_cache_max_bytes of device memory in total
+        # (256 MiB is ~680 tokens of Phi-3-mini fp16 KV, which is ~384 KiB per token).
+        self.kv_cache_slots = kv_cache_slots
+        self.kv_cache_max_bytes = kv_cache_max_bytes
+        self.min_prefix_tokens = min_prefix_tokens
+        self._kv_slots: "OrderedDict[int, tuple]" = OrderedDict()  # slot -> (token ids, DynamicCache, bytes)
+        self._kv_bytes = 0
+        self._next_slot = 0
+        # generate() runs in worker threads (agenerate, RequestBatcher, agenerate_plans)
+        self._kv_lock = threading.Lock()
+
+        # torch.compile the forward pass over a static KV cache (torch path only).
+        # A static cache cannot be cropped and reused, so prefix reuse is turned off.
+        self.compile_model = compile_model
+        if compile_model:
+            self.kv_cache_slots = 0
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            from transformers import AutoTokenizer
+            self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        return self._tokenizer
+
+    @property
+    def model(self):
+        if self._model is None:
+            print("Loading local model... (first time takes 2–5 minutes)")
+            if self.device is not None:
+                self._model = self._load_openvino(self.device)
+            else:
+                self._model = self._load_torch()
+        return self._model
+
+    def _load_torch(self):
+        import torch
+        from transformers import AutoModelForCausalLM
+
+        # Fused attention: FlashAttention-2 on CUDA when flash-attn is installed, else
+        # PyTorch SDPA; eager only for models that support neither
+        impls = ["sdpa", "eager"]
+        if torch.cuda.is_available() and importlib.util.find_spec("flash_attn") is not None:
+            impls.insert(0, "flash_attention_2")
+        for i, attn in enumerate(impls):
+            try:
+                model = AutoModelForCausalLM.from_pretrained(
+                    self.model_name,
+                    device_map="auto",
+                    attn_implementation=attn,
+                    **self._quantization_kwargs(self.quantization)
+                )
+                break
+            except (ImportError, ValueError):
+                if i == len(impls) - 1:
+                    raise
+
+        if self.compile_model:
+            # Compile forward rather than the module so model.generate stays available
+            model.generation_config.cache_implementation = "static"
+            model.forward = torch.compile(model.forward, mode="reduce-overhead", fullgraph=False)
+        return model
+
+    def _load_openvino(self, device: str):
+        """INT8 weight-compressed OpenVINO IR (NNCF); uses AMX/VNNI int8 kernels on Intel CPUs."""
+        from optimum.intel import OVModelForCausalLM
+        return OVModelForCausalLM.from_pretrained(
+            self.model_name,
+            export=True,
+            load_in_8bit=True,
+            device=device,
+            ov_config={"PERFORMANCE_HINT": "LATENCY", "INFERENCE_PRECISION_HINT": "bf16"}
         )
 
+    @staticmethod
+    def _quantization_kwargs(quantization: str) -> dict:
+        import torch
+        from transformers import BitsAndBytesConfig
+        if quantization == "int4":
+            return {"quantization_config": BitsAndBytesConfig(
+                load_in_4bit=True,
+                bnb_4bit_quant_type="nf4",
+                bnb_4bit_use_double_quant=True,
+                # bf16 needs Ampere+; older GPUs compute in fp16
+                bnb_4bit_compute_dtype=torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+            )}
+        if quantization == "int8":
+            return {"quantization_config": BitsAndBytesConfig(load_in_8bit=True)}
+        if quantization == "fp16":
+            return {"torch_dtype": torch.float16}
+        raise ValueError(f"Unknown quantization '{quantization}' (expected fp16, int8 or int4)")
+
+    def _sampling_kwargs(self) -> dict:
+        # temperature == 0 means greedy decoding (deterministic, hence cacheable)
+        if self.temperature > 0:
+            return {"temperature": self.temperature, "do_sample": True}
+        return {"do_sample": False}
+
+    @cached_generate
     def generate(self, prompt: str) -> str:
+        import torch
         inputs = self.tokenizer(prompt, return_tensors="pt").to(self.model.device)
 
+        # No autograd bookkeeping during generation
+        with torch.inference_mode():
+            if self.device is None and self.kv_cache_slots > 0:
+                outputs = self._generate_with_prefix_cache(inputs["input_ids"])
+            else:
+                outputs = self.model.generate(
+                    **inputs,
+                    max_new_tokens=self.max_new_tokens,
+                    **self._sampling_kwargs()
+                )
+
+        return self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+
+    def _generate_with_prefix_cache(self, input_ids):
+        import torch
+        from transformers import DynamicCache
+        ids = input_ids[0]
+
+        # 1. Find the cached slot sharing the longest token prefix with this prompt and
+        #    take it out under the lock, so no other thread can reuse the same cache
+        past = None
+        with self._kv_lock:
+            slot, prefix_len = None, 0
+            for key, (cached_ids, _, _) in self._kv_slots.items():
+                n = self._common_prefix_len(cached_ids, ids)
+                if n > prefix_len:
+                    slot, prefix_len = key, n
+            if slot is not None and prefix_len >= self.min_prefix_tokens:
+                _, past, nbytes = self._kv_slots.pop(slot)
+                self._kv_bytes -= nbytes
+
+        # 2. Trim it to the shared prefix; at least one prompt token must still
+        #    be prefilled so generate has logits for the first new token
+        if past is not None:
+            past.crop(min(prefix_len, ids.shape[0] - 1))
+
+        # 3. generate skips the positions already covered by past_key_values
         outputs = self.model.generate(
-            **inputs,
-            max_new_tokens=300,
-            temperature=0.7,
-            do_sample=True
+            input_ids=input_ids,
+            attention_mask=torch.ones_like(input_ids),
+            past_key_values=past,
+            use_cache=True,
+            return_dict_in_generate=True,
+            max_new_tokens=self.max_new_tokens,
+            **self._sampling_kwargs()
         )
 
-        return self.tokenizer.decode(outputs[0], skip_special_tokens=True)
+        # 4. Keep the new cache (prompt + generated tokens) for the next call
+        cache = outputs.past_key_values
+        if isinstance(cache, DynamicCache):
+            cached_len = cache.get_seq_length()
+            nbytes = cached_len * self._kv_bytes_per_token()
+            if nbytes <= self.kv_cache_max_bytes:
+                with self._kv_lock:
+                    self._kv_slots[self._next_slot] = (outputs.sequences[0, :cached_len], cache, nbytes)
+                    self._kv_bytes += nbytes
+                    self._next_slot += 1
+                    while len(self._kv_slots) > self.kv_cache_slots or self._kv_bytes > self.kv_cache_max_bytes:
+                        _, _, evicted = self._kv_slots.popitem(last=False)[1]
+                        self._kv_bytes -= evicted
+        return outputs.sequences
+
+    def _kv_bytes_per_token(self) -> int:
+        # Keys + values for every layer, in the model's compute dtype
+        cfg = self.model.config
+        heads = cfg.num_attention_heads
+        kv_heads = getattr(cfg, "num_key_value_heads", None) or heads
+        head_dim = getattr(cfg, "head_dim", None) or cfg.hidden_size // heads
+        return 2 * cfg.num_hidden_layers * kv_heads * head_dim * self.model.dtype.itemsize
+
+    @staticmethod
+    def _common_prefix_len(a, b) -> int:
+        n = min(a.shape[0], b.shape[0])
+        if n == 0:
+            return 0
+        mismatch = (a[:n] != b[:n]).nonzero()
+        return int(mismatch[0, 0]) if mismatch.numel() else n
+
+    def reset_cache(self):
+        """Drops every reused KV cache (e.g. when a conversation is cleared)."""
+        with self._kv_lock:
+            self._kv_slots.clear()
+            self._kv_bytes = 0
+
+    def stream_generate(self, prompt: str) -> Iterator[str]:
+        """
+        Yields decoded text chunks as the model emits them: generate runs in a
+        background thread and feeds a TextIteratorStreamer, so the first chunk
+        arrives after one decode step instead of after the whole completion.
+        """
+        from transformers import TextIteratorStreamer
+        inputs = self.tokenizer(prompt, return_tensors="pt").to(self.model.device)
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        errors: List[BaseException] = []
+
+        def run():
+            try:
+                self.model.generate(**inputs, streamer=streamer, max_new_tokens=self.max_new_tokens,
+                                    **self._sampling_kwargs())
+            except BaseException as e:
+                # Unblock the consumer below, which would otherwise wait on the queue forever
+                errors.append(e)
+                streamer.end()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        for text in streamer:
+            yield text
+        thread.join()
+        if errors:
+            raise errors[0]
+
+    def generate_batch(self, prompts: List[str]) -> List[str]:
+        """
+        Runs several prompts through one padded model.generate call
+        (see llm.batcher.RequestBatcher). Outputs keep the order of prompts.
+        """
+        import torch
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        # Decoder-only models must be left-padded so generation continues from real tokens
+        self.tokenizer.padding_side = "left"
+        inputs = self.tokenizer(prompts, padding=True, return_tensors="pt").to(self.model.device)
+
+        with torch.inference_mode():
+            outputs = self.model.generate(
+                **inputs,
+                max_new_tokens=self.max_new_tokens,
+                pad_token_id=self.tokenizer.pad_token_id,
+                **self._sampling_kwargs()
+            )
+
+        return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
 
     # This is required by your controller
     def synthesize(self, user_input, results):
-        context = f"User request: {user_input}\nResults: {results}\nWrite a final helpful report."
+        context = f"{SYNTHESIS_PREFIX}User request: {user_input}\nResults: {results}"
         return self.generate(context)
+
+    # Async variants: generation is in-process and CPU/GPU bound, so it is
+    # offloaded to a worker thread to keep the event loop free for other sessions.
+    async def agenerate(self, prompt: str) -> str:
+        return await asyncio.to_thread(self.generate, prompt)
+
+    async def astream_generate(self, prompt: str):
+        # Each chunk is pulled in a worker thread; the streamer blocks between tokens
+        stream = self.stream_generate(prompt)
+        done = object()
+        while True:
+            text = await asyncio.to_thread(next, stream, done)
+            if text is done:
+                return
+            yield text
+
+    async def asynthesize(self, user_input, results):
+        return await asyncio.to_thread(self.synthesize, user_input, results)
+
+
+class OpenVINOClient(HFLocalLLM):
+    """
+    HFLocalLLM pinned to the OpenVINO INT8 path (optimum.intel.OVModelForCausalLM)
+    on the given device, regardless of CUDA availability.
+    """
+    def __init__(self, model_name="microsoft/Phi-3-mini-4k-instruct", device: str = "CPU", **kwargs):
+        if not _openvino_available():
+            raise ImportError("OpenVINOClient requires optimum-intel: pip install optimum[openvino]")
+        super().__init__(model_name, device=device, **kwargs)
+
+
+class RemoteLLM:
+    """
+    Prompt-string adapter over an LLMRequest-based LLMClient (HTTPLLMClient,
+    LLMClientPool), exposing the generate/agenerate/synthesize/asynthesize
+    contract the Planner and AgentController use.
+    """
+    def __init__(self, client: LLMClient, temperature: float = 0.7, max_new_tokens: int = 300):
+        self.client = client
+        self.model_name = getattr(client, "model", "remote")
+        self.temperature = temperature
+        self.max_new_tokens = max_new_tokens
+
+    def _request(self, prompt: str) -> LLMRequest:
+        return LLMRequest(prompt=prompt, temperature=self.temperature, max_tokens=self.max_new_tokens)
+
+    def generate(self, prompt: str) -> str:
+        return self.client.generate(self._request(prompt)).text
+
+    async def agenerate(self, prompt: str) -> str:
+        return (await self.client.agenerate(self._request(prompt))).text
+
+    async def astream_generate(self, prompt: str):
+        async for text in self.client.astream_generate(self._request(prompt)):
+            yield text
+
+    def synthesize(self, user_input, results):
+        return self.generate(f"{SYNTHESIS_PREFIX}User request: {user_input}\nResults: {results}")
+
+    async def asynthesize(self, user_input, results):
+        return await self.agenerate(f"{SYNTHESIS_PREFIX}User request: {user_input}\nResults: {results}")
+
+
+class LLMClientFactory:
+    """Single entry point for building any supported LLM backend."""
+    @staticmethod
+    def create(provider: LLMProvider, model: Optional[str] = None, **kwargs):
+        if provider == LLMProvider.MOCK:
+            return MockLLM(**kwargs)
+        if provider == LLMProvider.OPENVINO:
+            return OpenVINOClient(model or "microsoft/Phi-3-mini-4k-instruct", **kwargs)
+        if provider == LLMProvider.HUGGINGFACE:
+            return HFLocalLLM(model or "microsoft/Phi-3-mini-4k-instruct", **kwargs)
+        if provider == LLMProvider.OPENAI:
+            # Network clients pull in httpx, so they are imported only when requested
+            from llm.http_client import HTTPLLMClient
+            sampling = {k: kwargs.pop(k) for k in ("temperature", "max_new_tokens") if k in kwargs}
+            endpoints = kwargs.pop("endpoints", None)
+            if endpoints:
+                from llm.pool import LLMClientPool
+                client = LLMClientPool([
+                    HTTPLLMClient(model=model, provider=provider, **{**kwargs, **endpoint})
+                    for endpoint in endpoints
+                ])
+            else:
+                client = HTTPLLMClient(model=model, provider=provider, **kwargs)
+            return RemoteLLM(client, **sampling)
+        raise ValueError(f"Unsupported LLM provider: {provider}")
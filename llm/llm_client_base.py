@@ -1,11 +1,20 @@
+import asyncio
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict
+
+
+# Shared prompt templates. The static instructions come first so prompts share a
+# cacheable prefix; llm.cache uses them to find the dynamic part of a prompt.
+SYNTHESIS_PREFIX = "Write a final helpful report for the request below using the workflow results.\n\n"
+COMPACTION_PREFIX = "Summarize the following workflow step results, keeping every fact needed for a final report.\n\n"
+GOAL_MARKER = "\n\nGoal: "
 
 
 class LLMProvider(Enum):
     OPENAI = "openai"
     OPENVINO = "openvino"
+    HUGGINGFACE = "huggingface"
     MOCK = "mock"
 
 
@@ -25,3 +34,12 @@ class LLMResponse:
 class LLMClient:
     def generate(self, request: LLMRequest) -> LLMResponse:
         raise NotImplementedError("Subclasses must implement generate()")
+
+    async def agenerate(self, request: LLMRequest) -> LLMResponse:
+        """Native async call; network-backed clients should override with an async HTTP client."""
+        return await asyncio.to_thread(self.generate, request)
+
+    async def astream_generate(self, request: LLMRequest) -> AsyncIterator[str]:
+        """Yields text chunks as they arrive; default yields the full response once."""
+        response = await self.agenerate(request)
+        yield response.text
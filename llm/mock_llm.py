@@ -1,11 +1,52 @@
+import asyncio
+import json
+import re
+import time
+from typing import Iterator, Optional
+from llm.cache import LLMCache, cached_generate
+from llm.llm_client_base import GOAL_MARKER
+
+
 class MockLLM:
     """
     Fake LLM so framework can run without real AI model
     """
+    model_name = "mock"
+    temperature = 0.0
+    max_new_tokens = 0
+
+    # Prompt intent routing: one case-insensitive pass over the prompt, compiled once
+    _INTENT_RE = re.compile(r"plan|steps|decompos|analyz|explain", re.IGNORECASE)
+    _INTENTS = {"plan": "plan", "step": "plan", "deco": "plan", "anal": "analysis", "expl": "analysis"}
 
+    def __init__(self, cache: Optional[LLMCache] = None, semantic_cache=None, delay_ms: float = 0.0,
+                 token_delay_ms: float = 0.0):
+        # Simulated provider latency on the async path, for concurrency/load tests.
+        # When streaming, delay_ms is the time to first token and token_delay_ms the
+        # gap between later tokens.
+        self.delay_ms = delay_ms
+        self.token_delay_ms = token_delay_ms
+        self.cache = cache if cache is not None else LLMCache()
+        self.stats = self.cache.stats
+        # Optional llm.semantic_cache.SemanticCache for near-duplicate prompts
+        self.semantic_cache = semantic_cache
+
+    @cached_generate
     def generate(self, prompt: str):
+        match = self._INTENT_RE.search(prompt)
+        intent = self._INTENTS.get(match.group(0)[:4].lower()) if match else None
+        if intent == "plan":
+            # Valid plan JSON so the Planner's parsing path is exercised, not its fallback
+            goal = prompt.rsplit(GOAL_MARKER, 1)[-1]
+            return json.dumps({"tasks": [{"id": "analysis", "action": "llm_tool",
+                                          "params": {"query": goal}}]})
+        if intent == "analysis":
+            return f"[MOCK LLM ANALYSIS] {prompt}"
         return f"[MOCK LLM RESPONSE] {prompt}"
 
+    def generate_batch(self, prompts):
+        return [self.generate(p) for p in prompts]
+
     def synthesize(self, original_input, results):
         """
         Combine all task outputs into final response
@@ -24,3 +65,30 @@ Workflow Results:
 
 ===== END REPORT =====
 """
+
+    async def agenerate(self, prompt: str):
+        if self.delay_ms:
+            await asyncio.sleep(self.delay_ms / 1000)
+        return self.generate(prompt)
+
+    def stream_generate(self, prompt: str) -> Iterator[str]:
+        # Sleeps inside the token loop so chunks arrive as they are "produced"
+        delay = self.delay_ms
+        for word in self.generate(prompt).split(" "):
+            if delay:
+                time.sleep(delay / 1000)
+            delay = self.token_delay_ms
+            yield word + " "
+
+    async def astream_generate(self, prompt: str):
+        delay = self.delay_ms
+        for word in self.generate(prompt).split(" "):
+            if delay:
+                await asyncio.sleep(delay / 1000)
+            delay = self.token_delay_ms
+            yield word + " "
+
+    async def asynthesize(self, original_input, results):
+        if self.delay_ms:
+            await asyncio.sleep(self.delay_ms / 1000)
+        return self.synthesize(original_input, results)
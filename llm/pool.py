@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from llm.llm_client_base import LLMClient, LLMRequest, LLMResponse
+
+try:
+    import httpx
+    _TRANSPORT_ERRORS = (httpx.TransportError, OSError, asyncio.TimeoutError)
+except ImportError:
+    httpx = None
+    _TRANSPORT_ERRORS = (OSError, asyncio.TimeoutError)
+
+
+def _endpoint_failed(exc: BaseException) -> bool:
+    """True for errors that say the endpoint is unhealthy, not that the request is bad."""
+    if httpx is not None and isinstance(exc, httpx.HTTPStatusError):
+        code = exc.response.status_code
+        return code == 429 or code >= 500
+    return isinstance(exc, _TRANSPORT_ERRORS)
+
+
+@dataclass
+class _Endpoint:
+    client: LLMClient
+    in_flight: int = 0
+    ewma_ms: float = 0.0
+    unhealthy_until: float = 0.0
+
+
+class LLMClientPool(LLMClient):
+    """
+    Spreads calls over several equivalent backends (e.g. vLLM / OpenVINO Model
+    Server replicas). Each call goes to the endpoint with the lowest
+    (in_flight + 1) * EWMA latency; an endpoint that raises a transport error or
+    answers 429/5xx is benched for cooldown_s and the call is retried on the next
+    best one. Other errors (e.g. a 400 for a bad request) are raised as-is.
+    """
+    def __init__(self, clients: List[LLMClient], cooldown_s: float = 30.0, ewma_alpha: float = 0.2):
+        if not clients:
+            raise ValueError("LLMClientPool needs at least one client")
+        self.endpoints = [_Endpoint(client) for client in clients]
+        self.cooldown_s = cooldown_s
+        self.ewma_alpha = ewma_alpha
+        self._lock = threading.Lock()
+
+    def _ranked(self) -> List[_Endpoint]:
+        now = time.monotonic()
+        with self._lock:
+            healthy = [e for e in self.endpoints if e.unhealthy_until <= now]
+            # Everything benched: still try them all rather than fail outright
+            candidates = healthy or list(self.endpoints)
+            return sorted(candidates, key=lambda e: (e.in_flight + 1) * (e.ewma_ms or 1.0))
+
+    def _start(self, endpoint: _Endpoint) -> float:
+        with self._lock:
+            endpoint.in_flight += 1
+        return time.perf_counter()
+
+    def _finish(self, endpoint: _Endpoint, started: float, ok: Optional[bool]):
+        """ok=True feeds the latency EWMA, ok=False benches the endpoint, None only releases it."""
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            endpoint.in_flight -= 1
+            if ok:
+                a = self.ewma_alpha
+                endpoint.ewma_ms = elapsed_ms if not endpoint.ewma_ms else a * elapsed_ms + (1 - a) * endpoint.ewma_ms
+            elif ok is False:
+                endpoint.unhealthy_until = time.monotonic() + self.cooldown_s
+
+    def generate(self, request: LLMRequest) -> LLMResponse:
+        error: Optional[BaseException] = None
+        for endpoint in self._ranked():
+            started = self._start(endpoint)
+            ok = None
+            try:
+                response = endpoint.client.generate(request)
+                ok = True
+                return response
+            except Exception as e:
+                if not _endpoint_failed(e):
+                    raise
+                ok, error = False, e
+            finally:
+                self._finish(endpoint, started, ok)
+        raise error
+
+    async def agenerate(self, request: LLMRequest) -> LLMResponse:
+        error: Optional[BaseException] = None
+        for endpoint in self._ranked():
+            started = self._start(endpoint)
+            ok = None
+            try:
+                response = await endpoint.client.agenerate(request)
+                ok = True
+                return response
+            except Exception as e:
+                if not _endpoint_failed(e):
+                    raise
+                ok, error = False, e
+            finally:
+                # Also runs on cancellation (e.g. asyncio.wait_for timeouts)
+                self._finish(endpoint, started, ok)
+        raise error
+
+    async def astream_generate(self, request: LLMRequest):
+        # No mid-stream failover: the stream stays on the endpoint it started on
+        endpoint = self._ranked()[0]
+        started = self._start(endpoint)
+        ok = None
+        try:
+            async for chunk in endpoint.client.astream_generate(request):
+                yield chunk
+            ok = True
+        except Exception as e:
+            if _endpoint_failed(e):
+                ok = False
+            raise
+        finally:
+            self._finish(endpoint, started, ok)
@@ -0,0 +1,94 @@
+import asyncio
+import collections
+import time
+from typing import Dict, Hashable, Optional
+
+
+class TokenBucket:
+    """
+    Paces calls below a provider rate limit: holds up to capacity tokens,
+    refilled continuously at refill_per_sec. acquire(n) waits until n are available,
+    so requests are spread out instead of bursting into 429s and retries.
+    """
+    def __init__(self, capacity: float, refill_per_sec: float):
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        self.tokens = capacity
+        self.last = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.refill_per_sec)
+        self.last = now
+
+    async def acquire(self, n: float = 1):
+        # Larger than the bucket could ever hold: wait for a full bucket instead
+        n = min(n, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= n:
+                self.tokens -= n
+                return
+            await asyncio.sleep((n - self.tokens) / self.refill_per_sec)
+
+
+# One bucket per (provider, model): every client of the same account limit shares it
+_BUCKETS: Dict[Hashable, TokenBucket] = {}
+
+
+def shared_bucket(key: Hashable, per_minute: float) -> TokenBucket:
+    bucket = _BUCKETS.get(key)
+    if bucket is None:
+        bucket = _BUCKETS[key] = TokenBucket(capacity=per_minute, refill_per_sec=per_minute / 60)
+    return bucket
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit used as `async with limiter:`.
+    Each success raises the limit by 1/limit (about +1 per round of requests);
+    an overload signal (HTTP 429) multiplies it by backoff.
+    """
+    def __init__(self, initial: int, min_limit: int = 1, max_limit: Optional[int] = None,
+                 backoff: float = 0.5):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit if max_limit is not None else initial
+        self.backoff = backoff
+        self.in_flight = 0
+        self._waiters: collections.deque = collections.deque()
+
+    async def __aenter__(self):
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Pass a wake-up we may have consumed on to the next waiter
+                self._wake()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.in_flight -= 1
+        self._wake()
+
+    def on_success(self):
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake()
+
+    def on_overload(self):
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+
+    def _wake(self):
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
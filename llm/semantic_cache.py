@@ -0,0 +1,90 @@
+import threading
+from typing import Any, Callable, List, Optional
+
+import numpy as np
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+
+class SemanticCache:
+    """
+    Near-duplicate prompt cache: embeds each prompt and returns the cached
+    response of the most similar earlier prompt when cosine similarity >= threshold.
+    Embeddings live in one contiguous float32 matrix so lookup is a single GEMV;
+    past faiss_min_entries (and with faiss installed) an IndexFlatIP is used instead.
+    Safe to share between threads: embedding runs unlocked, the matrix update and
+    search run under one lock.
+    """
+    def __init__(self, embedder: Optional[Callable[[str], Any]] = None, threshold: float = 0.92,
+                 model_name: str = "all-MiniLM-L6-v2", faiss_min_entries: int = 10_000):
+        self.threshold = threshold
+        self.model_name = model_name
+        self.faiss_min_entries = faiss_min_entries
+        self.stats = {"hits": 0, "misses": 0}
+        self._embedder = embedder
+        self._matrix: Optional[np.ndarray] = None  # (capacity, dim), first _size rows valid
+        self._size = 0
+        self._responses: List[Any] = []
+        self._index = None
+        # generate() runs in worker threads (agenerate, batched planning)
+        self._lock = threading.Lock()
+
+    def _embed(self, text: str) -> np.ndarray:
+        if self._embedder is None:
+            # Loaded on first use so importing this module stays cheap
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(self.model_name)
+            self._embedder = lambda t: model.encode(t, normalize_embeddings=True)
+        vec = np.asarray(self._embedder(text), dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def lookup(self, prompt: str) -> Optional[Any]:
+        if not self._size:
+            self.stats["misses"] += 1
+            return None
+        query = self._embed(prompt)
+        with self._lock:
+            if self._index is not None:
+                sims, ids = self._index.search(query[None, :], 1)
+                best, best_sim = int(ids[0, 0]), float(sims[0, 0])
+            else:
+                sims = self._matrix[:self._size] @ query
+                best = int(np.argmax(sims))
+                best_sim = float(sims[best])
+
+            if best_sim >= self.threshold:
+                self.stats["hits"] += 1
+                return self._responses[best]
+            self.stats["misses"] += 1
+            return None
+
+    def add(self, prompt: str, response: Any):
+        vec = self._embed(prompt)
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.empty((64, vec.shape[0]), dtype=np.float32)
+            elif self._size == self._matrix.shape[0]:
+                # Amortized O(1) append: double the backing matrix when full
+                grown = np.empty((self._size * 2, self._matrix.shape[1]), dtype=np.float32)
+                grown[:self._size] = self._matrix[:self._size]
+                self._matrix = grown
+            self._matrix[self._size] = vec
+            self._size += 1
+            self._responses.append(response)
+
+            if self._index is not None:
+                self._index.add(vec[None, :])
+            elif faiss is not None and self._size > self.faiss_min_entries:
+                self._index = faiss.IndexFlatIP(self._matrix.shape[1])
+                self._index.add(self._matrix[:self._size])
+
+    def clear(self):
+        with self._lock:
+            self._matrix = None
+            self._size = 0
+            self._responses.clear()
+            self._index = None
@@ -1,19 +1,30 @@
+import argparse
 import sys
-from llm.llm_client import HFLocalLLM
+from llm.llm_client import LLMClientFactory
+from llm.llm_client_base import LLMProvider
 from agent.controller import AgentController
 from agent.flow import TaskFlow, Task
 from tools.tool_registry import ToolRegistry
 from observability.logger import AgentLogger
 
+BACKENDS = {
+    "mock": LLMProvider.MOCK,
+    "hf": LLMProvider.HUGGINGFACE,
+    "openvino": LLMProvider.OPENVINO,
+}
+
 def main():
+    parser = argparse.ArgumentParser(description="Run the demo agent workflow.")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="hf",
+                        help="LLM backend: mock (no model), hf (HuggingFace) or openvino (Intel INT8)")
+    args = parser.parse_args()
+
     # 1. Setup Observability
     logger = AgentLogger(name="Framework-Demo")
     logger.info("Initializing AI Agent Framework...")
 
-    # 2. Initialize Optimized LLM (Intel OpenVINO)
-    # This uses the local Intel-optimized model defined in your llm_client
-
-    llm = HFLocalLLM()
+    # 2. Initialize the selected LLM backend (Intel OpenVINO, HuggingFace or mock)
+    llm = LLMClientFactory.create(BACKENDS[args.backend])
 
 
 
@@ -3,9 +3,31 @@ import sys
 import time
 from typing import Optional
 
+# Optional structured (JSON) logging
+try:
+    import structlog
+except ImportError:
+    structlog = None
+
 # Professional format for agentic tracing
 LOG_FORMAT = "%(asctime)s | %(levelname)-8s | [%(name)s] %(message)s"
 
+def _struct_logger(name: str):
+    if structlog is None:
+        return None
+    # Leave an application's own structlog setup alone
+    if not structlog.is_configured():
+        structlog.configure(
+            processors=[
+                structlog.processors.add_log_level,
+                structlog.processors.TimeStamper(fmt="iso"),
+                structlog.processors.JSONRenderer(),
+            ],
+            wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
+            cache_logger_on_first_use=True,
+        )
+    return structlog.get_logger(name)
+
 class AgentLogger:
     """
     Framework-wide logger for monitoring and benchmarking.
@@ -15,6 +37,7 @@ class AgentLogger:
         self.logger = logging.getLogger(name)
         self.logger.setLevel(logging.INFO)
         self.start_times = {}
+        self._struct = _struct_logger(name)
 
         if not self.logger.handlers:
             # Console Handler
@@ -23,14 +46,32 @@ class AgentLogger:
             handler.setFormatter(formatter)
             self.logger.addHandler(handler)
 
-    def info(self, msg: str):
-        self.logger.info(msg)
+    # Extra args are %-formatted lazily, only if the record is actually emitted
+    def info(self, msg: str, *args):
+        self.logger.info(msg, *args)
+
+    def error(self, msg: str, *args):
+        self.logger.error(msg, *args)
+
+    def warning(self, msg: str, *args):
+        self.logger.warning(msg, *args)
 
-    def error(self, msg: str):
-        self.logger.error(msg)
+    def isEnabledFor(self, level: int) -> bool:
+        return self.logger.isEnabledFor(level)
 
-    def warning(self, msg: str):
-        self.logger.warning(msg)
+    def event(self, event: str, **fields):
+        """
+        Structured INFO record, e.g. event("tool_finished", tool=name, latency_ms=12.3).
+        Rendered as JSON by structlog when installed, else as key=value pairs.
+        Nothing is formatted when INFO is disabled.
+        """
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        if self._struct is not None:
+            self._struct.info(event, logger=self.logger.name, **fields)
+        else:
+            pairs = " ".join(f"{k}={v}" for k, v in fields.items())
+            self.logger.info("%s %s", event, pairs, extra={"fields": fields})
 
     # --- Benchmarking Features (Intel DevCloud Requirement) ---
 
@@ -42,10 +83,10 @@ class AgentLogger:
         """Stops timer and returns elapsed time in milliseconds."""
         if label in self.start_times:
             elapsed = (time.perf_counter() - self.start_times[label]) * 1000
-            self.info(f"PERF | {label} completed in {elapsed:.2f}ms")
+            self.info("PERF | %s completed in %.2fms", label, elapsed)
             return elapsed
         return 0.0
 
     def log_intel_metric(self, model_name: str, latency: float, device: str):
         """Specifically logs metrics for Intel OpenVINO optimization reports."""
-        self.info(f"INTEL_TECH | Model: {model_name} | Latency: {latency:.2f}ms | Device: {device}")
+        self.info("INTEL_TECH | Model: %s | Latency: %.2fms | Device: %s", model_name, latency, device)
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+
+from agent.controller import AgentController
+from agent.flow import Task, TaskFlow
+from llm.checkpoint import JsonlCheckpoint
+from llm.mock_llm import MockLLM
+
+
+class JsonlCheckpointTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "run.jsonl")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_reopen_restores_completed_responses(self):
+        checkpoint = JsonlCheckpoint(self.path)
+        key = checkpoint.request_hash("task", "input", "a")
+        checkpoint.append(key, {"response": "done"})
+        checkpoint.close()
+
+        reopened = JsonlCheckpoint(self.path)
+        self.assertEqual(reopened.get(key), {"response": "done"})
+        self.assertIsNone(reopened.get(reopened.request_hash("task", "input", "b")))
+        reopened.close()
+
+    def test_partial_last_line_is_dropped_and_appends_survive(self):
+        checkpoint = JsonlCheckpoint(self.path)
+        checkpoint.append("a", 1)
+        checkpoint.close()
+        # Crash mid-write: a record without its trailing newline
+        with open(self.path, "ab") as f:
+            f.write(b'{"request_hash": "b", "resp')
+
+        resumed = JsonlCheckpoint(self.path)
+        self.assertEqual(list(resumed.seen), ["a"])
+        resumed.append("c", 3)
+        resumed.close()
+
+        reopened = JsonlCheckpoint(self.path)
+        self.assertEqual((reopened.get("a"), reopened.get("b"), reopened.get("c")), (1, None, 3))
+        reopened.close()
+
+    def test_request_hash_is_order_insensitive_for_dict_args(self):
+        self.assertEqual(JsonlCheckpoint.request_hash({"x": 1, "y": 2}),
+                         JsonlCheckpoint.request_hash({"y": 2, "x": 1}))
+
+
+class WorkflowResumeTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "run.jsonl")
+        self.controller = AgentController(MockLLM(), storage_type="memory", synthesis_shortcut=False)
+        self.calls = []
+        execute = self.controller.tools.execute
+
+        def counting_execute(name, args=None, context=None, history=None):
+            self.calls.append(args["query"])
+            return execute(name, args, context, history)
+        self.controller.tools.execute = counting_execute
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def flow(self):
+        return (TaskFlow("resume")
+                .add_task(Task("a", "llm_tool", {"query": "a"}))
+                .add_task(Task("b", "llm_tool", {"query": "b"})))
+
+    def test_rerun_skips_checkpointed_tasks(self):
+        # First run dies in synthesis, after both tasks completed
+        synthesize = self.controller.llm.synthesize
+        def crash(*args):
+            raise RuntimeError("killed")
+        self.controller.llm.synthesize = crash
+        with self.assertRaises(RuntimeError):
+            self.controller.execute_workflow(self.flow(), "report", checkpoint_path=self.path)
+        self.assertEqual(self.calls, ["a", "b"])
+
+        self.controller.llm.synthesize = synthesize
+        result = self.controller.execute_workflow(self.flow(), "report", checkpoint_path=self.path)
+        self.assertEqual(result["status"], "completed")
+        self.assertEqual(self.calls, ["a", "b"])
+
+    def test_different_input_does_not_reuse_checkpoint(self):
+        self.controller.execute_workflow(self.flow(), "first", checkpoint_path=self.path)
+        self.controller.execute_workflow(self.flow(), "second", checkpoint_path=self.path)
+        self.assertEqual(self.calls, ["a", "b", "a", "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
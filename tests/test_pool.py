@@ -0,0 +1,138 @@
+import asyncio
+import time
+import unittest
+
+from llm import pool as pool_module
+from llm.llm_client_base import LLMClient, LLMRequest, LLMResponse
+from llm.pool import LLMClientPool
+
+
+class FakeClient(LLMClient):
+    """Returns its name, or raises `error`; agenerate can be held open with `gate`."""
+    def __init__(self, name, error=None, gate=None):
+        self.name = name
+        self.error = error
+        self.gate = gate
+        self.calls = 0
+
+    def generate(self, request):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return LLMResponse(text=self.name)
+
+    async def agenerate(self, request):
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.error is not None:
+            raise self.error
+        return LLMResponse(text=self.name)
+
+    async def astream_generate(self, request):
+        self.calls += 1
+        yield "a"
+        if self.error is not None:
+            raise self.error
+        yield "b"
+
+
+REQUEST = LLMRequest(prompt="hi")
+
+
+class LLMClientPoolTest(unittest.IsolatedAsyncioTestCase):
+    def assert_released(self, pool):
+        self.assertEqual([e.in_flight for e in pool.endpoints], [0] * len(pool.endpoints))
+
+    def test_transport_error_benches_and_retries_next(self):
+        bad, good = FakeClient("bad", error=OSError("connection refused")), FakeClient("good")
+        pool = LLMClientPool([bad, good])
+
+        self.assertEqual(pool.generate(REQUEST).text, "good")
+        self.assertGreater(pool.endpoints[0].unhealthy_until, time.monotonic())
+        self.assertEqual(pool.endpoints[1].unhealthy_until, 0.0)
+        self.assert_released(pool)
+
+        # The benched endpoint is skipped while it cools down
+        pool.generate(REQUEST)
+        self.assertEqual((bad.calls, good.calls), (1, 2))
+
+    def test_request_error_is_raised_without_benching(self):
+        bad, good = FakeClient("bad", error=ValueError("bad request")), FakeClient("good")
+        pool = LLMClientPool([bad, good])
+
+        with self.assertRaises(ValueError):
+            pool.generate(REQUEST)
+        self.assertEqual(good.calls, 0)
+        self.assertEqual(pool.endpoints[0].unhealthy_until, 0.0)
+        self.assert_released(pool)
+
+    def test_all_endpoints_failing_raises_last_error(self):
+        pool = LLMClientPool([FakeClient("a", error=OSError("a")), FakeClient("b", error=OSError("b"))])
+        with self.assertRaises(OSError):
+            pool.generate(REQUEST)
+        self.assert_released(pool)
+
+    async def test_agenerate_retries_next_endpoint(self):
+        pool = LLMClientPool([FakeClient("bad", error=asyncio.TimeoutError()), FakeClient("good")])
+        self.assertEqual((await pool.agenerate(REQUEST)).text, "good")
+        self.assertGreater(pool.endpoints[0].unhealthy_until, time.monotonic())
+        self.assert_released(pool)
+
+    async def test_cancellation_releases_without_benching(self):
+        gate = asyncio.Event()
+        pool = LLMClientPool([FakeClient("slow", gate=gate)])
+
+        task = asyncio.create_task(pool.agenerate(REQUEST))
+        await asyncio.sleep(0)
+        self.assertEqual(pool.endpoints[0].in_flight, 1)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assert_released(pool)
+        self.assertEqual(pool.endpoints[0].unhealthy_until, 0.0)
+
+    async def test_stream_error_benches_and_releases(self):
+        pool = LLMClientPool([FakeClient("bad", error=OSError("reset"))])
+        chunks = []
+        with self.assertRaises(OSError):
+            async for chunk in pool.astream_generate(REQUEST):
+                chunks.append(chunk)
+        self.assertEqual(chunks, ["a"])
+        self.assertGreater(pool.endpoints[0].unhealthy_until, time.monotonic())
+        self.assert_released(pool)
+
+    async def test_stream_closed_early_releases(self):
+        pool = LLMClientPool([FakeClient("ok")])
+        stream = pool.astream_generate(REQUEST)
+        self.assertEqual(await stream.__anext__(), "a")
+        await stream.aclose()
+        self.assert_released(pool)
+        self.assertEqual(pool.endpoints[0].unhealthy_until, 0.0)
+
+    def test_latency_ewma_steers_to_faster_endpoint(self):
+        pool = LLMClientPool([FakeClient("slow"), FakeClient("fast")])
+        pool.endpoints[0].ewma_ms, pool.endpoints[1].ewma_ms = 50.0, 5.0
+        self.assertEqual(pool.generate(REQUEST).text, "fast")
+
+
+@unittest.skipIf(pool_module.httpx is None, "httpx not installed")
+class EndpointFailedStatusTest(unittest.TestCase):
+    @staticmethod
+    def status_error(code):
+        httpx = pool_module.httpx
+        request = httpx.Request("POST", "http://llm/chat/completions")
+        response = httpx.Response(code, request=request)
+        return httpx.HTTPStatusError("error", request=request, response=response)
+
+    def test_overload_and_server_errors_bench(self):
+        for code in (429, 500, 503):
+            self.assertTrue(pool_module._endpoint_failed(self.status_error(code)), code)
+
+    def test_client_errors_do_not_bench(self):
+        for code in (400, 401, 404, 422):
+            self.assertFalse(pool_module._endpoint_failed(self.status_error(code)), code)
+
+
+if __name__ == "__main__":
+    unittest.main()
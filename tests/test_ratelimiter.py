@@ -0,0 +1,80 @@
+import asyncio
+import unittest
+
+from llm.ratelimiter import AdaptiveLimiter, TokenBucket
+
+
+class AdaptiveLimiterTest(unittest.IsolatedAsyncioTestCase):
+    async def test_caps_concurrency_at_limit(self):
+        limiter = AdaptiveLimiter(2)
+        running, peak = 0, 0
+
+        async def call():
+            nonlocal running, peak
+            async with limiter:
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*[call() for _ in range(6)])
+        self.assertEqual(peak, 2)
+        self.assertEqual(limiter.in_flight, 0)
+
+    async def test_exit_wakes_next_waiter(self):
+        limiter = AdaptiveLimiter(1)
+        await limiter.__aenter__()
+        waiter = asyncio.create_task(limiter.__aenter__())
+        await asyncio.sleep(0)
+        self.assertFalse(waiter.done())
+
+        await limiter.__aexit__(None, None, None)
+        await asyncio.wait_for(waiter, 1)
+        self.assertEqual(limiter.in_flight, 1)
+
+    async def test_cancelled_waiter_passes_wakeup_on(self):
+        limiter = AdaptiveLimiter(1)
+        await limiter.__aenter__()
+        first = asyncio.create_task(limiter.__aenter__())
+        second = asyncio.create_task(limiter.__aenter__())
+        await asyncio.sleep(0)
+
+        # Release wakes `first`, which is cancelled before it can take the slot
+        await limiter.__aexit__(None, None, None)
+        first.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+
+        await asyncio.wait_for(second, 1)
+        self.assertEqual(limiter.in_flight, 1)
+        self.assertFalse(limiter._waiters)
+
+    def test_aimd_adjustments(self):
+        limiter = AdaptiveLimiter(8, min_limit=1)
+        limiter.on_overload()
+        self.assertEqual(limiter.limit, 4)
+        for _ in range(100):
+            limiter.on_success()
+        self.assertEqual(limiter.limit, 8)
+        for _ in range(10):
+            limiter.on_overload()
+        self.assertEqual(limiter.limit, 1)
+
+
+class TokenBucketTest(unittest.IsolatedAsyncioTestCase):
+    async def test_request_larger_than_capacity_waits_for_full_bucket(self):
+        bucket = TokenBucket(capacity=10, refill_per_sec=1000)
+        await asyncio.wait_for(bucket.acquire(50), 1)
+        self.assertLess(bucket.tokens, 1)
+
+    async def test_waits_for_refill(self):
+        bucket = TokenBucket(capacity=5, refill_per_sec=100)
+        await bucket.acquire(5)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await bucket.acquire(2)
+        self.assertGreaterEqual(loop.time() - started, 0.015)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,21 @@
+import inspect
+import json
+import threading
 import time
+from collections import deque
 from typing import Callable, Any, Optional, Dict, List
 from dataclasses import dataclass, field
 from enum import Enum
 from observability.logger import AgentLogger
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Most recent calls kept in usage_history; older ones only live on in the aggregates
+USAGE_HISTORY_SIZE = 10_000
+
 class ToolType(Enum):
     WEB = "web"
     FILE = "file"
@@ -11,7 +23,7 @@ class ToolType(Enum):
     ML_INFERENCE = "ml_inference" # For Intel OpenVINO tools
     SYSTEM = "system"
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Tool:
     name: str
     type: ToolType
@@ -21,6 +33,18 @@ class Tool:
     required_params: List[str] = field(default_factory=list)
     # Metadata for Intel-specific tagging (e.g., "optimized": True)
     metadata: Dict[str, Any] = field(default_factory=dict)
+    # Precomputed once so execute() validates with a single C-level set difference
+    _required_set: frozenset = field(init=False, repr=False, compare=False)
+    # Handlers that declare a `context` parameter also receive the flow/session context
+    _takes_context: bool = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_required_set", frozenset(self.required_params))
+        try:
+            takes_context = "context" in inspect.signature(self.handler).parameters
+        except (TypeError, ValueError):
+            takes_context = False
+        object.__setattr__(self, "_takes_context", takes_context)
 
 class ToolResult:
     def __init__(self, tool_name: str, success: bool, output: Any = None, 
@@ -39,23 +63,48 @@ class ToolRegistry:
     Registry and Execution Engine for Agent Tools.
     Includes performance monitoring for Intel DevCloud benchmarking.
     """
-    def __init__(self):
+    def __init__(self, record_usage: bool = False):
         self.tools: Dict[str, Tool] = {}
         self.logger = AgentLogger(name="ToolRegistry")
-        self.usage_history: List[Dict] = []
+        # Per-call history is only kept when benchmarking, as a bounded ring buffer
+        self.record_usage = record_usage
+        self.usage_history: deque = deque(maxlen=USAGE_HISTORY_SIZE)
+        # Running [latency sum, count] per bucket so get_benchmarks is O(1)
+        self._agg = {"opt": [0.0, 0], "std": [0.0, 0]}
+        # Tools run in worker threads (DAG waves, asyncio.to_thread); guards the aggregates
+        self._agg_lock = threading.Lock()
 
     def register(self, tool: Tool) -> 'ToolRegistry':
         self.tools[tool.name] = tool
-        self.logger.info(f"Registered tool: {tool.name} ({tool.type.value})")
+        self.logger.info("Registered tool: %s (%s)", tool.name, tool.type.value)
         return self
 
     def execute(self, name, args=None, context=None, history=None):
         """
-        Universal tool executor compatible with controller
+        Universal tool executor compatible with controller.
+        Handlers are called with args as keyword arguments; the context is
+        passed only to handlers that declare a `context` parameter.
         """
 
         args = args or {}
 
+        tool = self.tools.get(name)
+        if tool is not None:
+            missing = tool._required_set.difference(args)
+            if missing:
+                raise ValueError(f"Missing params for tool '{name}': {sorted(missing)}")
+            kwargs = {**args, "context": context} if tool._takes_context else args
+            start = time.perf_counter()
+            try:
+                output = tool.handler(**kwargs)
+            except Exception as e:
+                latency_ms = (time.perf_counter() - start) * 1000
+                self._log_usage(ToolResult(name, False, error=str(e), latency_ms=latency_ms), args, tool.metadata)
+                raise
+            latency_ms = (time.perf_counter() - start) * 1000
+            self._log_usage(ToolResult(name, True, output, latency_ms=latency_ms), args, tool.metadata)
+            return output
+
         # Temporary demo tool — LLM tool
         if name == "llm_tool":
             query = args.get("query", "")
@@ -69,30 +118,45 @@ class ToolRegistry:
 
     def _log_usage(self, result: ToolResult, params: Dict, metadata: Dict):
         """Internal helper for auditing and benchmarking."""
-        log_entry = {
-            "tool": result.tool_name,
-            "success": result.success,
-            "latency_ms": result.latency_ms,
-            "intel_optimized": metadata.get("optimized", False),
-            "timestamp": time.time()
-        }
-        self.usage_history.append(log_entry)
+        intel_optimized = metadata.get("optimized", False)
+        agg = self._agg["opt" if intel_optimized else "std"]
+        with self._agg_lock:
+            agg[0] += result.latency_ms
+            agg[1] += 1
+        if self.record_usage:
+            self.usage_history.append({
+                "tool": result.tool_name,
+                "success": result.success,
+                "latency_ms": result.latency_ms,
+                "intel_optimized": intel_optimized,
+                "timestamp": time.time()
+            })
         
         # Log to the primary observability system
-        if log_entry["intel_optimized"]:
+        if intel_optimized:
             self.logger.log_intel_metric(result.tool_name, result.latency_ms, metadata.get("device", "CPU"))
         else:
-            self.logger.info(f"Tool {result.tool_name} finished in {result.latency_ms:.2f}ms")
+            self.logger.event("tool_finished", tool=result.tool_name, latency_ms=result.latency_ms,
+                              success=result.success)
 
     def get_benchmarks(self) -> Dict:
-        """Returns data for the Design Doc / Benchmark deliverable."""
-        if not self.usage_history: return {}
-        
-        optimized = [l for l in self.usage_history if l["intel_optimized"]]
-        standard = [l for l in self.usage_history if not l["intel_optimized"]]
+        """Returns data for the Design Doc / Benchmark deliverable (all calls since start)."""
+        with self._agg_lock:
+            (opt_sum, opt_n), (std_sum, std_n) = self._agg["opt"], self._agg["std"]
+        if not opt_n and not std_n: return {}
         
         return {
-            "avg_latency_optimized": sum(l["latency_ms"] for l in optimized) / len(optimized) if optimized else 0,
-            "avg_latency_standard": sum(l["latency_ms"] for l in standard) / len(standard) if standard else 0,
-            "total_calls": len(self.usage_history)
+            "avg_latency_optimized": opt_sum / opt_n if opt_n else 0,
+            "avg_latency_standard": std_sum / std_n if std_n else 0,
+            "total_calls": opt_n + std_n
         }
+
+    def save_usage_history(self, path: str):
+        """Writes the recorded usage ring buffer to a JSON file (orjson when installed)."""
+        entries = list(self.usage_history)
+        if orjson is not None:
+            with open(path, "wb") as f:
+                f.write(orjson.dumps(entries))
+        else:
+            with open(path, "w") as f:
+                json.dump(entries, f)